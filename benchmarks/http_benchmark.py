@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "http_baseline.json")
+PASSWORD = "benchmark"
+WORDS = "fastapi sqlite python async cache index query latency throughput worker blog user".split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drive main.app in-process and report per-route latency.")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests in the measured run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=200, help="requests sent before measuring")
+    parser.add_argument("--blogs", type=int, default=1000, help="blogs seeded into the temporary database")
+    parser.add_argument("--users", type=int, default=200, help="users seeded into the temporary database")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="allowed relative slowdown of p95 per route and of total throughput before failing",
+    )
+    return parser.parse_args()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def migrate(db_file):
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{db_file}")
+    command.upgrade(config, "head")
+
+
+async def seed(blogs, users, rng):
+    from sqlalchemy import insert
+
+    from config.db_config import async_session
+    from models.blog_model import Blog
+    from models.user_model import USER
+    from services.counter_service import rebuild_counters
+    from services.password_service import pwd_context
+
+    hashed = pwd_context.hash(PASSWORD)
+    now = datetime.utcnow()
+    user_rows = [
+        {
+            "username": "owner" if i == 0 else f"user{i}", "password": hashed, "gender": "m",
+            "email": f"user{i}@example.com", "phone_number": f"0900{i:07d}", "custom_user_id": f"u{i}",
+            "is_active": True, "is_owner": i == 0, "is_superuser": i == 0, "is_staff": i == 0,
+            "date_joined": now,
+        }
+        for i in range(users)
+    ]
+    blog_rows = [
+        {
+            "title": sentence(rng, 6), "slug": f"seed-{i}", "short_description": sentence(rng, 20),
+            "text": sentence(rng, rng.randint(200, 2000)), "save_type": rng.choice("NDP"), "author": 1,
+            "created": now - timedelta(minutes=blogs - i), "modified": now - timedelta(minutes=blogs - i),
+            "is_delete": False,
+        }
+        for i in range(blogs)
+    ]
+    async with async_session() as sess:
+        await sess.execute(insert(USER), user_rows)
+        await sess.execute(insert(Blog), blog_rows)
+        await sess.commit()
+        await rebuild_counters(sess)
+
+
+class Mix:
+    def __init__(self, client, token, blogs, rng):
+        self.client = client
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.blogs = blogs
+        self.rng = rng
+        self.new_slugs = itertools.count()
+        self.scenarios = [
+            (self.read_blog, 30),
+            (self.read_blog_by_slug, 10),
+            (self.list_blogs, 15),
+            (self.search_blogs, 5),
+            (self.create_blog, 3),
+            (self.update_blog, 2),
+            (self.list_users, 5),
+            (self.read_stats, 1),
+            (self.login, 1),
+        ]
+        self.functions = [scenario for scenario, _ in self.scenarios]
+        self.weights = [weight for _, weight in self.scenarios]
+
+    def pick(self):
+        return self.rng.choices(self.functions, self.weights)[0]
+
+    def blog_id(self):
+        # Reads lean towards recent posts, as real traffic does.
+        return self.blogs - min(int(self.rng.expovariate(1 / 50)), self.blogs - 1)
+
+    async def read_blog(self):
+        response = await self.client.get(f"/blogs/{self.blog_id()}", headers={"Accept-Encoding": "gzip"})
+        return "GET /blogs/{blog_id}", response
+
+    async def read_blog_by_slug(self):
+        response = await self.client.get(f"/blogs/by-slug/seed-{self.blog_id() - 1}")
+        return "GET /blogs/by-slug/{slug}", response
+
+    async def list_blogs(self):
+        params = {"limit": 20, "view": self.rng.choice(["full", "summary"])}
+        response = await self.client.get("/blogs/", params=params)
+        return f"GET /blogs/?view={params['view']}", response
+
+    async def search_blogs(self):
+        response = await self.client.get("/blogs/search", params={"q": self.rng.choice(WORDS), "limit": 10})
+        return "GET /blogs/search", response
+
+    async def create_blog(self):
+        blog = {
+            "title": sentence(self.rng, 6), "slug": f"bench-{next(self.new_slugs)}-{self.rng.random()}",
+            "short_description": sentence(self.rng, 20), "text": sentence(self.rng, 500), "save_type": "N",
+            "author": 1,
+        }
+        response = await self.client.post("/blogs/", json=blog, headers=self.auth)
+        return "POST /blogs/", response
+
+    async def update_blog(self):
+        response = await self.client.put(
+            f"/blogs/{self.blog_id()}", json={"title": sentence(self.rng, 6)}, headers=self.auth
+        )
+        return "PUT /blogs/{blog_id}", response
+
+    async def list_users(self):
+        response = await self.client.get("/owner/users/", params={"limit": 50}, headers=self.auth)
+        return "GET /owner/users/", response
+
+    async def read_stats(self):
+        response = await self.client.get("/stats/", headers=self.auth)
+        return "GET /stats/", response
+
+    async def login(self):
+        username = f"user{self.rng.randint(1, 9)}"
+        response = await self.client.post(
+            "/authenticate/gettoken/", json={"username": username, "password": PASSWORD}
+        )
+        return "POST /authenticate/gettoken/", response
+
+
+async def drive(mix, total, concurrency):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    remaining = itertools.count(total, -1)
+
+    async def worker():
+        while next(remaining) > 0:
+            scenario = mix.pick()
+            start = time.perf_counter()
+            route, response = await scenario()
+            latencies[route].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[route] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def summarize(latencies, errors, elapsed):
+    def row(values, error_count):
+        values = sorted(values)
+        return {
+            "count": len(values),
+            "errors": error_count,
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+
+    routes = {route: row(values, errors[route]) for route, values in sorted(latencies.items())}
+    total = row([value for values in latencies.values() for value in values], sum(errors.values()))
+    return {"elapsed_s": round(elapsed, 3), "routes": routes, "total": total}
+
+
+def print_report(report):
+    print(f"{'route':<34}{'count':>7}{'err':>5}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in [*report["routes"].items(), ("TOTAL", report["total"])]:
+        print(
+            f"{route:<34}{stats['count']:>7}{stats['errors']:>5}{stats['rps']:>10.1f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+
+
+def compare(report, baseline, threshold):
+    failures = []
+    for route, stats in report["routes"].items():
+        previous = baseline["routes"].get(route)
+        if previous and stats["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            failures.append(f"{route}: p95 {previous['p95_ms']:.2f} ms -> {stats['p95_ms']:.2f} ms")
+    previous_rps, rps = baseline["total"]["rps"], report["total"]["rps"]
+    if rps < previous_rps * (1 - threshold):
+        failures.append(f"throughput: {previous_rps:.1f} -> {rps:.1f} req/s")
+    return failures
+
+
+async def run(args, rng):
+    import httpx
+
+    from main import app
+
+    await seed(args.blogs, args.users, rng)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            response = await client.post(
+                "/authenticate/gettoken/", json={"username": "owner", "password": PASSWORD}
+            )
+            mix = Mix(client, response.json()["access_token"], args.blogs, rng)
+            await drive(mix, args.warmup, args.concurrency)
+            return summarize(*await drive(mix, args.requests, args.concurrency))
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app reads its settings at import time, so the temporary database and a
+        # disabled purge loop are configured before anything from the app is imported.
+        db_file = os.path.join(tmp, "benchmark.db")
+        os.environ["DB_FILE"] = db_file
+        os.environ.setdefault("BLOG_PURGE_INTERVAL", "0")
+        sys.path.insert(0, ROOT)
+        migrate(db_file)
+        report = asyncio.run(run(args, rng))
+
+    report["config"] = {
+        key: getattr(args, key) for key in ("requests", "concurrency", "warmup", "blogs", "users", "seed")
+    }
+    print_report(report)
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against; rerun with --save-baseline")
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("config") != report["config"]:
+        print("warning: baseline was recorded with different settings")
+    failures = compare(report, baseline, args.threshold)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
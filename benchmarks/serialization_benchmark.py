@@ -0,0 +1,70 @@
+import asyncio
+import timeit
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from models.blog_model import Blog
+from models.user_model import USER
+from schemas.blog_schema import BlogRead
+from schemas.user_schema import OwnerRead
+from services.serialization_service import dump_list
+
+ROWS = 100
+NUMBER = 200
+
+
+def make_blogs() -> List[Blog]:
+    now = datetime.utcnow()
+    return [
+        Blog(
+            id=i, title=f"Title {i}", slug=f"slug-{i}", short_description="short " * 8, text="body " * 200,
+            save_type="N", author=1, created=now, modified=now, is_delete=False,
+        )
+        for i in range(ROWS)
+    ]
+
+
+def make_users() -> List[USER]:
+    now = datetime.now()
+    return [
+        USER(
+            id=i, username=f"user{i}", first_name="First", last_name="Last", email=f"user{i}@example.com",
+            password="x" * 60, pass_per_save="secret", gender="m", phone_number=str(i), bio="bio " * 20,
+            custom_user_id=f"c{i}", is_active=True, is_superuser=False, is_staff=False, is_owner=False,
+            date_joined=now, last_login=now,
+        )
+        for i in range(ROWS)
+    ]
+
+
+def main():
+    for name, schema, rows in (("blogs", BlogRead, make_blogs()), ("users", OwnerRead, make_users())):
+        field = create_model_field(name="Response", type_=List[schema], mode="serialization")
+        loop = asyncio.new_event_loop()
+
+        # Mirrors the old handlers: from_orm per row, then FastAPI's own validation and
+        # serialization against response_model, then JSONResponse rendering.
+        def run_legacy() -> bytes:
+            content = [schema.from_orm(row) for row in rows]
+            data = loop.run_until_complete(serialize_response(field=field, response_content=content))
+            return JSONResponse(data).body
+
+        def run_fast() -> bytes:
+            return dump_list(schema, rows)
+
+        run_fast()
+        legacy_time = min(timeit.repeat(run_legacy, number=NUMBER, repeat=5)) / NUMBER
+        fast_time = min(timeit.repeat(run_fast, number=NUMBER, repeat=5)) / NUMBER
+        loop.close()
+        print(
+            f"{name}: {ROWS} rows  legacy {legacy_time * 1e3:.3f} ms  "
+            f"type adapter {fast_time * 1e3:.3f} ms  speedup {legacy_time / fast_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
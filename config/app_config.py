@@ -0,0 +1,55 @@
+import os
+
+PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 1024))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+
+BLOG_CACHE_SIZE = int(os.getenv("BLOG_CACHE_SIZE", 2048))
+BLOG_CACHE_TTL = float(os.getenv("BLOG_CACHE_TTL", 300))
+
+DB_FILE = os.getenv("DB_FILE", "database.db")
+DB_PROFILE = os.getenv("DB_PROFILE", "development")
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", 1))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", 8))
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", 64))
+
+BLOG_BULK_BATCH_SIZE = int(os.getenv("BLOG_BULK_BATCH_SIZE", 1000))
+
+USER_BULK_BATCH_SIZE = int(os.getenv("USER_BULK_BATCH_SIZE", 500))
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+
+BLOG_PURGE_INTERVAL = float(os.getenv("BLOG_PURGE_INTERVAL", 3600))
+BLOG_PURGE_RETENTION_DAYS = float(os.getenv("BLOG_PURGE_RETENTION_DAYS", 30))
+BLOG_PURGE_BATCH_SIZE = int(os.getenv("BLOG_PURGE_BATCH_SIZE", 200))
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 9))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 9))
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", 50))
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "log")
+
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", 3000))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", os.cpu_count() or 1))
+SERVE_READY_TIMEOUT = float(os.getenv("SERVE_READY_TIMEOUT", 30))
+SERVE_GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", 30))
+SERVE_INVALIDATION_SLOTS = int(os.getenv("SERVE_INVALIDATION_SLOTS", 4096))
+SERVE_METRICS_INTERVAL = float(os.getenv("SERVE_METRICS_INTERVAL", 1))
+
+AUTHOR_CACHE_SIZE = int(os.getenv("AUTHOR_CACHE_SIZE", 4096))
+AUTHOR_CACHE_TTL = float(os.getenv("AUTHOR_CACHE_TTL", 30))
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+PHOTO_MAX_BYTES = int(os.getenv("PHOTO_MAX_BYTES", 10 * 1024 * 1024))
+PHOTO_WIDTHS = tuple(int(width) for width in os.getenv("PHOTO_WIDTHS", "320,640,1280").split(","))
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", min(2, os.cpu_count() or 1)))
+
+LAST_LOGIN_FLUSH_INTERVAL = float(os.getenv("LAST_LOGIN_FLUSH_INTERVAL", 5))
+LAST_LOGIN_MAX_PENDING = int(os.getenv("LAST_LOGIN_MAX_PENDING", 1000))
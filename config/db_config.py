@@ -1,16 +1,235 @@
+import asyncio
+import contextvars
+import sqlite3
+import time
 from sqlmodel import SQLModel
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from typing import Annotated
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Annotated, Awaitable, Callable, List, Tuple, TypeVar
 from fastapi import Depends
+from config.app_config import (
+    DB_FILE, DB_PROFILE, DB_ECHO, DB_WRITE_POOL_SIZE, DB_READ_POOL_SIZE, DB_WRITE_BATCH_SIZE
+)
+from services.metrics_service import before_cursor_execute, after_cursor_execute, metrics
 
-sqlite_file_name = "database.db"
+sqlite_file_name = DB_FILE
 sqlite_url = f"sqlite+aiosqlite:///{sqlite_file_name}"
 
+# PRAGMAs applied to every new connection. A value of None leaves the SQLite default.
+ENGINE_PROFILES = {
+    "development": {
+        "journal_mode": None,
+        "synchronous": None,
+        "mmap_size": None,
+        "cache_size": None,
+        "busy_timeout": 5000,
+    },
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "busy_timeout": 5000,
+    },
+}
+engine_profile = ENGINE_PROFILES[DB_PROFILE]
+
+# Connections are pooled so the PRAGMAs are paid once per connection, not per checkout.
 connect_args = {"check_same_thread": False}
-engine = create_async_engine(sqlite_url, connect_args=connect_args, echo=True)
+engine = create_async_engine(
+    sqlite_url, connect_args=connect_args, echo=DB_ECHO,
+    poolclass=AsyncAdaptedQueuePool, pool_size=DB_WRITE_POOL_SIZE, max_overflow=0,
+)
+read_engine = create_async_engine(
+    sqlite_url, connect_args=connect_args, echo=DB_ECHO,
+    poolclass=AsyncAdaptedQueuePool, pool_size=DB_READ_POOL_SIZE,
+)
+
+
+def apply_pragmas(dbapi_connection, pragmas: dict):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        if value is not None:
+            cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+
+# The driver's own transaction handling is switched off on the write engine so
+# SAVEPOINTs work, and transactions start with BEGIN IMMEDIATE: the write lock is
+# taken up front and waited for under busy_timeout, instead of a deferred
+# transaction failing with "database is locked" when it tries to upgrade.
+@event.listens_for(engine.sync_engine, "connect")
+def set_write_pragmas(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+    apply_pragmas(dbapi_connection, engine_profile)
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def begin_immediate(conn):
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+# Readers leave the journal mode to the writer and refuse to write at all.
+@event.listens_for(read_engine.sync_engine, "connect")
+def set_read_pragmas(dbapi_connection, connection_record):
+    pragmas = {key: value for key, value in engine_profile.items() if key != "journal_mode"}
+    apply_pragmas(dbapi_connection, {**pragmas, "query_only": "ON"})
+
+
+# Statement counts and DB time are attributed to the request that issued them.
+for db_engine in (engine, read_engine):
+    event.listen(db_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(db_engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
 
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+async_read_session = sessionmaker(read_engine, expire_on_commit=False, class_=AsyncSession)
+
+T = TypeVar("T")
+WriteJob = Callable[[AsyncSession], Awaitable[T]]
+
+
+# Mutations are queued to a single writer task. Whatever is waiting when the
+# writer comes round is run in one transaction and committed once, so concurrent
+# writes share one fsync instead of queueing for the lock one by one. Each job
+# runs in its own SAVEPOINT: a failing job is rolled back alone and only its
+# caller sees the error. The identity map is emptied after every job, so objects
+# a job returns are detached and never shared with, or expired by, a later job
+# in the same batch. Jobs must not commit; side effects that depend on the
+# write belong after submit() returns.
+class WriteQueue:
+    def __init__(self, max_batch: int = 64):
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.jobs = 0
+        self.failed_jobs = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.largest_batch = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # The writer runs in an empty context so its own BEGIN, SAVEPOINT and COMMIT
+    # statements are not charged to whichever request happened to start it. A
+    # restarted writer takes over the jobs still queued for the one that died.
+    def start(self):
+        pending, self._queue = self._queue, asyncio.Queue()
+        while pending is not None and not pending.empty():
+            self._queue.put_nowait(pending.get_nowait())
+        self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    # Jobs already queued are still committed before the writer exits.
+    async def stop(self):
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = self._queue = None
+
+    # The job runs with the caller's context, so its statements are attributed
+    # to the caller's request.
+    async def submit(self, job: WriteJob[T]) -> T:
+        if self._task is None or self._task.done():
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((job, contextvars.copy_context(), future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while batch[-1] is not None and len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            stopping = batch[-1] is None
+            if stopping:
+                batch.pop()
+            if batch:
+                await self._commit(batch)
+            if stopping:
+                return
+
+    async def _commit(self, batch: List[Tuple[WriteJob, contextvars.Context, asyncio.Future]]):
+        start = time.perf_counter()
+        outcomes = []
+        try:
+            # BEGIN and each SAVEPOINT are emitted lazily on first use; the
+            # connection is touched here so they run in the writer's context
+            # rather than in the job's.
+            async with async_session() as sess, sess.begin():
+                await sess.connection()
+                for job, context, future in batch:
+                    if future.cancelled():
+                        continue
+                    try:
+                        async with sess.begin_nested():
+                            await sess.connection()
+                            result = await asyncio.create_task(job(sess), context=context)
+                        outcomes.append((future, result, None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+                    finally:
+                        sess.expunge_all()
+        except Exception as exc:
+            self.failed_batches += 1
+            outcomes = [(future, None, error or exc) for future, _, error in outcomes]
+        except BaseException:
+            for _, _, future in batch:
+                future.cancel()
+            raise
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(result)
+            else:
+                self.failed_jobs += 1
+                future.set_exception(error)
+        self.jobs += len(outcomes)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(outcomes))
+        metrics.observe_write_batch(len(outcomes), time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "jobs": self.jobs,
+            "failed_jobs": self.failed_jobs,
+            "average_batch": round(self.jobs / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
+
+
+write_queue = WriteQueue(DB_WRITE_BATCH_SIZE)
+metrics.register_gauge("db_write_queue_depth", "Write jobs waiting for the writer.", lambda: write_queue.depth)
+
+
+# The journal mode is stored in the database file and switching it needs an
+# exclusive lock, so a supervisor sets it once before forking instead of letting
+# every worker race for it on its first connection.
+def prepare_database():
+    journal_mode = engine_profile["journal_mode"]
+    if journal_mode is None:
+        return
+    connection = sqlite3.connect(sqlite_file_name, timeout=engine_profile["busy_timeout"] / 1000)
+    try:
+        connection.execute(f"PRAGMA journal_mode = {journal_mode}")
+    finally:
+        connection.close()
+
+
+# Pools copied from a preloading parent are dropped without closing its
+# connections, so each worker opens its own.
+async def init_engines():
+    for db_engine in (engine, read_engine):
+        await db_engine.dispose(close=False)
 
 
 async def create_db_and_tables():
@@ -23,4 +242,10 @@ async def get_session() -> AsyncSession:
         yield session
 
 
+async def get_read_session() -> AsyncSession:
+    async with async_read_session() as session:
+        yield session
+
+
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
@@ -1,8 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
-from routers import user_router, blog_router, authenticate
+from routers import user_router, blog_router, authenticate, stats_router, metrics_router, health_router, media_router
 from fastapi.middleware.cors import CORSMiddleware
+from config.app_config import BLOG_PURGE_INTERVAL, SERVE_METRICS_INTERVAL
+from config.db_config import init_engines, write_queue
+from services.blog_cache_service import blog_cache
+from services.invalidation_service import InvalidationMiddleware, invalidations
+from services.metrics_service import MetricsMiddleware, metrics, run_metrics_snapshot_loop
+from services.last_login_service import last_login_buffer, run_last_login_flush_loop
+from services.password_service import password_hasher
+from services.photo_service import photo_processor
+from services.principal_service import principal_cache
+from services.purge_service import run_purge_loop
+from services.slug_service import slug_map
+
+
+# Per-process state is set up here rather than at import time, so workers forked
+# from a preloaded parent start with their own connections and empty caches.
+# Only worker 0 runs the purge loop.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_engines()
+    write_queue.start()
+    invalidations.seek_head()
+    blog_cache.clear()
+    principal_cache.clear()
+    await slug_map.warm()
+    run_purge = BLOG_PURGE_INTERVAL > 0 and getattr(app.state, "worker_id", 0) == 0
+    purge_task = asyncio.create_task(run_purge_loop()) if run_purge else None
+    last_login_task = asyncio.create_task(run_last_login_flush_loop())
+    snapshot_task = None
+    if metrics.directory is not None:
+        snapshot_task = asyncio.create_task(run_metrics_snapshot_loop(SERVE_METRICS_INTERVAL))
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    if purge_task is not None:
+        purge_task.cancel()
+    last_login_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await last_login_task
+    try:
+        await last_login_buffer.flush()
+    finally:
+        await write_queue.stop()
+        password_hasher.shutdown()
+        photo_processor.shutdown()
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+        metrics.write_snapshot()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -11,14 +62,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(InvalidationMiddleware)
 
 app.include_router(user_router.router, tags=["Users"])
 app.include_router(blog_router.router, tags=["Blogs"])
 app.include_router(authenticate.router, tags=["Authenticate"])
+app.include_router(stats_router.router, tags=["Stats"])
+app.include_router(metrics_router.router, tags=["Metrics"])
+app.include_router(health_router.router, tags=["Health"])
+app.include_router(media_router.router, tags=["Media"])
 
 # Start the server
 if __name__ == "__main__":
-    import uvicorn
+    import serve
 
-    uvicorn.run("main:app", host="0.0.0.0", port=3000)
+    serve.main()
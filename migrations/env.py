@@ -2,6 +2,7 @@ from sqlmodel import SQLModel
 # Insert Models Here
 from models.blog_model import Blog
 from models.user_model import USER
+from models.counter_model import Counter
 
 from logging.config import fileConfig
 
@@ -31,6 +32,12 @@ target_metadata = SQLModel.metadata
 # ... etc.
 
 
+# The FTS5 search index and its shadow tables are created by hand in a
+# migration and have no model, so autogenerate must not offer to drop them.
+def include_name(name, type_, parent_names) -> bool:
+    return not (type_ == "table" and name.startswith("Blogs_fts"))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -47,6 +54,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -70,7 +78,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,52 @@
+"""create Counter Model
+
+Revision ID: 0f5e99bd473c
+Revises: 45d23c9ab0e3
+Create Date: 2026-10-18 13:05:13.463762
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f5e99bd473c'
+down_revision: Union[str, None] = '45d23c9ab0e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('Counters',
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.execute("""
+        INSERT INTO "Counters" (key, value)
+        SELECT 'blogs:all', COUNT(*) FROM "Blogs" WHERE is_delete = 0
+    """)
+    op.execute("""
+        INSERT INTO "Counters" (key, value)
+        SELECT 'blogs:save_type:' || save_type, COUNT(*) FROM "Blogs" WHERE is_delete = 0 GROUP BY save_type
+    """)
+    op.execute("""
+        INSERT INTO "Counters" (key, value)
+        SELECT 'users:all', COUNT(*) FROM "Users"
+    """)
+    op.execute("""
+        INSERT INTO "Counters" (key, value)
+        SELECT 'users:role:' || CASE
+            WHEN is_owner THEN 'owner'
+            WHEN is_superuser THEN 'superuser'
+            WHEN is_staff THEN 'staff'
+            ELSE 'normal'
+        END AS role, COUNT(*) FROM "Users" GROUP BY role
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('Counters')
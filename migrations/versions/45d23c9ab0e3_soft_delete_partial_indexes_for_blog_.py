@@ -0,0 +1,38 @@
+"""soft delete partial indexes for Blog Model
+
+Revision ID: 45d23c9ab0e3
+Revises: bb0b674ea1a7
+Create Date: 2026-10-18 13:03:32.973680
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '45d23c9ab0e3'
+down_revision: Union[str, None] = 'bb0b674ea1a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_Blogs_created_id', table_name='Blogs')
+    op.create_index('ix_Blogs_live_created_id', 'Blogs', ['created', 'id'], unique=False,
+                    sqlite_where=sa.text('is_delete = 0'))
+    op.drop_index('ix_Blogs_slug', table_name='Blogs')
+    op.create_index('ix_Blogs_slug', 'Blogs', ['slug'], unique=True,
+                    sqlite_where=sa.text('is_delete = 0'))
+    op.create_index('ix_Blogs_deleted_modified', 'Blogs', ['modified'], unique=False,
+                    sqlite_where=sa.text('is_delete = 1'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Blogs_deleted_modified', table_name='Blogs')
+    op.drop_index('ix_Blogs_slug', table_name='Blogs')
+    op.create_index('ix_Blogs_slug', 'Blogs', ['slug'], unique=True)
+    op.drop_index('ix_Blogs_live_created_id', table_name='Blogs')
+    op.create_index('ix_Blogs_created_id', 'Blogs', ['created', 'id'], unique=False)
@@ -0,0 +1,77 @@
+"""add Blogs_fts full text search index
+
+Revision ID: 8d8a5e6becae
+Revises: bfecf3124133
+Create Date: 2026-10-18 12:55:59.628518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d8a5e6becae'
+down_revision: Union[str, None] = 'bfecf3124133'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE VIRTUAL TABLE "Blogs_fts" USING fts5(
+            title, short_description, text, content='Blogs', content_rowid='id'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER "Blogs_fts_ai" AFTER INSERT ON "Blogs" BEGIN
+            INSERT INTO "Blogs_fts"(rowid, title, short_description, text)
+            VALUES (new.id, new.title, new.short_description, new.text);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER "Blogs_fts_ad" AFTER DELETE ON "Blogs" BEGIN
+            INSERT INTO "Blogs_fts"("Blogs_fts", rowid, title, short_description, text)
+            VALUES ('delete', old.id, old.title, old.short_description, old.text);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER "Blogs_fts_au" AFTER UPDATE OF title, short_description, text ON "Blogs" BEGIN
+            INSERT INTO "Blogs_fts"("Blogs_fts", rowid, title, short_description, text)
+            VALUES ('delete', old.id, old.title, old.short_description, old.text);
+            INSERT INTO "Blogs_fts"(rowid, title, short_description, text)
+            VALUES (new.id, new.title, new.short_description, new.text);
+        END
+    """)
+
+    # Index the existing rows a batch at a time instead of in one huge INSERT ... SELECT.
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        ids = bind.execute(
+            sa.text('SELECT id FROM "Blogs" WHERE id > :last_id ORDER BY id LIMIT :batch_size'),
+            {"last_id": last_id, "batch_size": BATCH_SIZE},
+        ).scalars().all()
+        if not ids:
+            break
+        bind.execute(
+            sa.text("""
+                INSERT INTO "Blogs_fts"(rowid, title, short_description, text)
+                SELECT id, title, short_description, text FROM "Blogs"
+                WHERE id BETWEEN :first_id AND :last_id
+            """),
+            {"first_id": ids[0], "last_id": ids[-1]},
+        )
+        last_id = ids[-1]
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS "Blogs_fts_au"')
+    op.execute('DROP TRIGGER IF EXISTS "Blogs_fts_ad"')
+    op.execute('DROP TRIGGER IF EXISTS "Blogs_fts_ai"')
+    op.execute('DROP TABLE IF EXISTS "Blogs_fts"')
@@ -0,0 +1,50 @@
+"""make Blog slug unique
+
+Revision ID: bb0b674ea1a7
+Revises: 8d8a5e6becae
+Create Date: 2026-10-18 12:56:48.728993
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bb0b674ea1a7'
+down_revision: Union[str, None] = '8d8a5e6becae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every duplicate after the oldest row gets its id appended to stay
+    # addressable. A suffixed slug can itself already exist (a post called
+    # "foo-7"), so candidates are checked against every slug in the table, and
+    # the index is only built once no duplicate is left.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text('SELECT id, slug FROM "Blogs" ORDER BY id')).all()
+    taken = {slug for _, slug in rows}
+    seen = set()
+    renames = []
+    for blog_id, slug in rows:
+        if slug not in seen:
+            seen.add(slug)
+            continue
+        candidate, attempt = f"{slug}-{blog_id}", 1
+        while candidate in taken:
+            attempt += 1
+            candidate = f"{slug}-{blog_id}-{attempt}"
+        taken.add(candidate)
+        renames.append({"id": blog_id, "slug": candidate})
+    if renames:
+        bind.execute(sa.text('UPDATE "Blogs" SET slug = :slug WHERE id = :id'), renames)
+    op.drop_index('ix_Blogs_slug', table_name='Blogs')
+    op.create_index('ix_Blogs_slug', 'Blogs', ['slug'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Blogs_slug', table_name='Blogs')
+    op.create_index('ix_Blogs_slug', 'Blogs', ['slug'], unique=False)
@@ -0,0 +1,27 @@
+"""add created id index to Blog Model
+
+Revision ID: bfecf3124133
+Revises: 12c21c814fb6
+Create Date: 2026-10-18 12:52:38.685561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bfecf3124133'
+down_revision: Union[str, None] = '12c21c814fb6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_Blogs_created_id', 'Blogs', ['created', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Blogs_created_id', table_name='Blogs')
@@ -1,13 +1,21 @@
+from sqlalchemy import Index, false, text
 from sqlmodel import Field, SQLModel
 from typing import Optional
 from datetime import datetime
 
 
+# Public queries filter on the literal "is_delete = 0" so SQLite can pick the
+# partial indexes below; a bound parameter would hide the match from the planner.
 class Blog(SQLModel, table=True):
     __tablename__ = "Blogs"
+    __table_args__ = (
+        Index("ix_Blogs_live_created_id", "created", "id", sqlite_where=text("is_delete = 0")),
+        Index("ix_Blogs_slug", "slug", unique=True, sqlite_where=text("is_delete = 0")),
+        Index("ix_Blogs_deleted_modified", "modified", sqlite_where=text("is_delete = 1")),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(index=True)
-    slug: str = Field(index=True)
+    slug: str
     blog_photo: Optional[str] = Field(default=None)
     short_description: Optional[str] = Field(default=None)
     text: str
@@ -16,3 +24,6 @@ class Blog(SQLModel, table=True):
     created: datetime = Field(default_factory=datetime.utcnow)
     modified: datetime = Field(default_factory=datetime.utcnow)
     is_delete: bool = Field(default=False)
+
+
+LIVE_BLOG_FILTER = Blog.is_delete == false()
@@ -0,0 +1,7 @@
+from sqlmodel import Field, SQLModel
+
+
+class Counter(SQLModel, table=True):
+    __tablename__ = "Counters"
+    key: str = Field(primary_key=True)
+    value: int = Field(default=0)
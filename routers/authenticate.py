@@ -5,11 +5,13 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 from sqlmodel import select
-from passlib.context import CryptContext
-from config.db_config import get_session
+from config.db_config import get_read_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.user_model import USER
 from schemas.authenticate_schema import AuthenticateRead, AuthenticateCreate
+from services.last_login_service import last_login_buffer
+from services.password_service import password_hasher
+from services.principal_service import Principal, principal_cache
 
 router = APIRouter()
 
@@ -19,22 +21,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/authenticate/gettoken/")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def get_password_hash(password):
+    return await password_hasher.hash(password)
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
 async def verify_user_credentials(username: str, password: str, session: AsyncSession):
     async with session as sess:
         result = await sess.execute(select(USER).where(USER.username == username))
         user = result.scalars().first()
-    if user and verify_password(password, user.password):
+    if user and await verify_password(password, user.password):
         return user
     return None
 
@@ -50,7 +49,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 
-async def get_current_user(session: AsyncSession = Depends(get_session), token: str = Depends(oauth2_scheme)) -> USER:
+async def get_current_user(session: AsyncSession = Depends(get_read_session), token: str = Depends(oauth2_scheme)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -64,18 +63,26 @@ async def get_current_user(session: AsyncSession = Depends(get_session), token:
     except JWTError:
         raise credentials_exception
 
+    principal = principal_cache.get(username)
+    if principal is not None:
+        return principal
+
     async with session as sess:
-        result = await sess.execute(select(USER).where(USER.username == username))
-        user = result.scalars().first()
-        if user is None:
+        result = await sess.execute(select(
+            USER.id, USER.username, USER.is_active, USER.is_staff, USER.is_superuser, USER.is_owner
+        ).where(USER.username == username))
+        row = result.first()
+        if row is None:
             raise credentials_exception
-        return user
+    principal = Principal(**row._mapping)
+    principal_cache.set(username, principal)
+    return principal
 
 
 @router.post("/authenticate/gettoken/", response_model=AuthenticateRead)
 async def login(
         form_data: AuthenticateCreate,
-        session: AsyncSession = Depends(get_session)
+        session: AsyncSession = Depends(get_read_session)
 ) -> AuthenticateRead:
     user = await verify_user_credentials(form_data.username, form_data.password, session)
     if not user:
@@ -94,10 +101,5 @@ async def login(
         expires_delta=access_token_expires
     )
 
-    async with session as sess:
-        user.last_login = datetime.utcnow()
-        sess.add(user)
-        await sess.commit()
-        await sess.refresh(user)
-
+    last_login_buffer.record(user.id, datetime.utcnow())
     return AuthenticateRead(access_token=access_token, token_type="bearer")
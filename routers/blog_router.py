@@ -1,17 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
-from typing import Annotated, List
-from models.blog_model import Blog
-from schemas.blog_schema import BlogRead, BlogCreate, BlogUpdate, BlogDelete
-from config.db_config import get_session
+from typing import Annotated, List, Literal, Optional, Union
+from models.blog_model import Blog, LIVE_BLOG_FILTER
+from schemas.blog_schema import (
+    BlogRead, BlogWithAuthorRead, BlogSummaryRead, BlogSummaryWithAuthorRead, BlogSearchRead, BlogCreate,
+    BlogUpdate, BlogDelete, BlogBulkResult, PhotoRead
+)
+from schemas.user_schema import AuthorRead
+from config.app_config import BLOG_BULK_BATCH_SIZE
+from config.db_config import get_read_session, write_queue
 from routers.authenticate import get_current_user, oauth2_scheme
-from models.user_model import USER
+from services.author_service import load_authors
+from services.compression_service import negotiate_encoding, variant_etag
+from services.counter_service import (
+    blog_count_key, blog_deltas, blog_save_type_key, bump_counters, read_counter
+)
+from services.blog_cache_service import CachedBlog, get_cached_blog, invalidate_blog
+from services.export_service import ExportFormat, export_response
+from services.http_cache_service import make_etag, validator_headers, is_not_modified, not_modified_response
+from services.import_service import import_blogs
+from services.pagination_service import encode_cursor, decode_cursor
+from services.photo_service import save_photo
+from services.principal_service import Principal
+from services.search_service import search_blogs
+from services.serialization_service import CountedList, json_list_response
+from services.slug_service import invalidate_slug, slug_map
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
+BLOG_SUMMARY_COLUMNS = [getattr(Blog, name) for name in BlogSummaryRead.model_fields]
 
-def check_admin_user(current_user: USER):
+Expand = Optional[Literal["author"]]
+
+
+def check_admin_user(current_user: Principal):
     if not (current_user.is_superuser or current_user.is_staff or current_user.is_owner):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -19,39 +45,179 @@ def check_admin_user(current_user: USER):
         )
 
 
-@router.get("/blogs/{blog_id}", response_model=BlogRead)
+def cached_blog_response(request: Request, blog: CachedBlog) -> Response:
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), blog.variants)
+    etag = variant_etag(blog.etag, encoding)
+    if is_not_modified(request, etag, blog.modified):
+        response = not_modified_response(etag, blog.modified)
+    else:
+        response = Response(
+            content=blog.variants[encoding] if encoding else blog.body,
+            media_type="application/json",
+            headers=validator_headers(etag, blog.modified),
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    if blog.variants:
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def author_etag_part(author: Optional[AuthorRead]) -> str:
+    if author is None:
+        return ""
+    return f"{author.id}:{author.username}:{author.first_name}:{author.last_name}"
+
+
+# The author is not part of the cached body, so the expanded representation gets
+# its own ETag covering the author summary and no Last-Modified.
+async def expanded_blog_response(request: Request, blog: CachedBlog) -> Response:
+    authors = await load_authors([blog.author])
+    author = authors.get(blog.author)
+    etag = make_etag(blog.etag, "author", author_etag_part(author))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    expanded = BlogWithAuthorRead.model_validate_json(blog.body)
+    expanded.author_detail = author
+    return Response(content=expanded.model_dump_json(), media_type="application/json", headers=validator_headers(etag))
+
+
+async def blog_response(request: Request, blog: CachedBlog, expand: Expand) -> Response:
+    if expand == "author":
+        return await expanded_blog_response(request, blog)
+    return cached_blog_response(request, blog)
+
+
+@router.get("/blogs/search", response_model=List[BlogSearchRead])
+async def search_blog(
+        q: Annotated[str, Query(min_length=1, max_length=200)],
+        session: AsyncSession = Depends(get_read_session),
+        offset: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=100)] = 20
+) -> List[BlogSearchRead]:
+    async with session as sess:
+        rows = await search_blogs(sess, q, limit, offset)
+    return json_list_response(BlogSearchRead, rows)
+
+
+@router.get("/blogs/export")
+async def export_blogs(
+        session: AsyncSession = Depends(get_read_session),
+        token: str = Depends(oauth2_scheme),
+        format: ExportFormat = "ndjson",
+        modified_since: Optional[datetime] = None
+):
+    current_user = await get_current_user(session=session, token=token)
+    check_admin_user(current_user)
+    statement = select(Blog).order_by(Blog.id)
+    if modified_since is not None:
+        statement = statement.where(Blog.modified >= modified_since)
+    return export_response(statement, BlogRead, format, "blogs")
+
+
+@router.get("/blogs/{blog_id}", response_model=BlogWithAuthorRead)
 async def read_blog(
         blog_id: int,
-        session: AsyncSession = Depends(get_session)
+        request: Request,
+        expand: Expand = None
 ) -> BlogRead:
-    async with session as sess:
-        blog = await sess.get(Blog, blog_id)
-        if not blog:
-            raise HTTPException(status_code=404, detail="Blog not found")
-    return BlogRead.from_orm(blog)
+    blog = await get_cached_blog(blog_id)
+    if not blog:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    return await blog_response(request, blog, expand)
+
+
+# A slug map entry can be stale when another worker renamed or deleted the post,
+# so the cached blog's slug is checked and the lookup retried once from the database.
+@router.get("/blogs/by-slug/{slug}", response_model=BlogWithAuthorRead)
+async def read_blog_by_slug(
+        slug: str,
+        request: Request,
+        expand: Expand = None
+) -> BlogRead:
+    for _ in range(2):
+        blog_id = await slug_map.resolve(slug)
+        if blog_id is None:
+            break
+        blog = await get_cached_blog(blog_id)
+        if blog and blog.slug == slug:
+            return await blog_response(request, blog, expand)
+        slug_map.discard(slug)
+        invalidate_blog(blog_id)
+    raise HTTPException(status_code=404, detail="Blog not found")
 
 
-@router.get("/blogs/", response_model=List[BlogRead])
+@router.get("/blogs/", response_model=Union[
+    List[BlogWithAuthorRead], List[BlogSummaryWithAuthorRead],
+    CountedList[BlogWithAuthorRead], CountedList[BlogSummaryWithAuthorRead],
+])
 async def read_blogs(
-        session: AsyncSession = Depends(get_session),
-        offset: int = 0,
-        limit: Annotated[int, Query(le=100)] = 100
-) -> List[BlogRead]:
+        request: Request,
+        session: AsyncSession = Depends(get_read_session),
+        offset: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=100)] = 100,
+        cursor: Optional[str] = None,
+        view: Literal["full", "summary"] = "full",
+        save_type: Optional[str] = None,
+        expand: Expand = None,
+        with_count: bool = False
+) -> Union[List[BlogRead], List[BlogSummaryRead]]:
+    if view == "summary":
+        statement = select(*BLOG_SUMMARY_COLUMNS)
+    else:
+        statement = select(Blog)
+    statement = statement.where(LIVE_BLOG_FILTER).order_by(Blog.created, Blog.id).limit(limit)
+    if save_type is not None:
+        statement = statement.where(Blog.save_type == save_type)
+    if cursor:
+        created, blog_id = decode_cursor(cursor, 2)
+        try:
+            created = datetime.fromisoformat(created)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if not isinstance(blog_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        statement = statement.where(tuple_(Blog.created, Blog.id) > (created, blog_id))
+    else:
+        statement = statement.offset(offset)
     async with session as sess:
-        result = await sess.execute(select(Blog).offset(offset).limit(limit))
-        blogs = result.scalars().all()
-    return [BlogRead.from_orm(blog) for blog in blogs]
+        result = await sess.execute(statement)
+        blogs = result.all() if view == "summary" else result.scalars().all()
+        total = await read_counter(sess, blog_count_key(save_type))
+    authors = await load_authors(blog.author for blog in blogs) if expand == "author" else {}
+    headers = {
+        "ETag": make_etag(
+            view, expand, with_count, total, *(f"{blog.id}:{blog.modified.isoformat()}" for blog in blogs),
+            *(author_etag_part(author) for author in authors.values()),
+        ),
+        "X-Total-Count": str(total),
+    }
+    if blogs and len(blogs) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(blogs[-1].created.isoformat(), blogs[-1].id)
+    if is_not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    count = total if with_count else None
+    if expand == "author":
+        rows = [
+            {**(blog._asdict() if view == "summary" else blog.model_dump()), "author_detail": authors.get(blog.author)}
+            for blog in blogs
+        ]
+        return json_list_response(
+            BlogSummaryWithAuthorRead if view == "summary" else BlogWithAuthorRead, rows, headers, count
+        )
+    return json_list_response(BlogSummaryRead if view == "summary" else BlogRead, blogs, headers, count)
 
 
 @router.post("/blogs/", response_model=BlogRead)
 async def create_blog(
         blog: BlogCreate,
-        session: AsyncSession = Depends(get_session),
+        session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> BlogRead:
     current_user = await get_current_user(session=session, token=token)
     check_admin_user(current_user)
-    async with session as sess:
+
+    async def insert_blog(sess: AsyncSession) -> Blog:
         db_blog = Blog(
             title=blog.title,
             slug=blog.slug,
@@ -62,47 +228,129 @@ async def create_blog(
             author=blog.author,
         )
         sess.add(db_blog)
-        await sess.commit()
-        await sess.refresh(db_blog)
+        try:
+            await bump_counters(sess, blog_deltas(db_blog.save_type, 1))
+            await sess.flush()
+        except IntegrityError:
+            raise HTTPException(status_code=400, detail="Slug already taken")
+        return db_blog
+
+    db_blog = await write_queue.submit(insert_blog)
+    invalidate_blog(db_blog.id)
+    slug_map.set(db_blog.slug, db_blog.id)
     return BlogRead.from_orm(db_blog)
 
 
+@router.post("/blogs/bulk", response_model=BlogBulkResult)
+async def create_blogs_bulk(
+        request: Request,
+        session: AsyncSession = Depends(get_read_session),
+        token: str = Depends(oauth2_scheme),
+        batch_size: Annotated[int, Query(ge=1, le=5000)] = BLOG_BULK_BATCH_SIZE
+) -> BlogBulkResult:
+    current_user = await get_current_user(session=session, token=token)
+    check_admin_user(current_user)
+    return await import_blogs(request.stream(), batch_size)
+
+
 @router.put("/blogs/{blog_id}", response_model=BlogRead)
 async def update_blog(
         blog_id: int,
         blog: BlogUpdate,
-        session: AsyncSession = Depends(get_session),
+        session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> BlogRead:
     current_user = await get_current_user(session=session, token=token)
     check_admin_user(current_user)
-    async with session as sess:
+
+    async def apply_update(sess: AsyncSession) -> tuple[Blog, str]:
         db_blog = await sess.get(Blog, blog_id)
-        if not db_blog:
+        if not db_blog or db_blog.is_delete:
             raise HTTPException(status_code=404, detail="Blog not found")
 
+        old_slug, old_save_type = db_blog.slug, db_blog.save_type
         blog_data = blog.model_dump(exclude_unset=True)
         for key, value in blog_data.items():
             setattr(db_blog, key, value)
+        db_blog.modified = datetime.utcnow()
 
         sess.add(db_blog)
-        await sess.commit()
-        await sess.refresh(db_blog)
+        try:
+            if db_blog.is_delete:
+                await bump_counters(sess, blog_deltas(old_save_type, -1))
+            elif db_blog.save_type != old_save_type:
+                await bump_counters(sess, {
+                    blog_save_type_key(old_save_type): -1, blog_save_type_key(db_blog.save_type): 1
+                })
+            await sess.flush()
+        except IntegrityError:
+            raise HTTPException(status_code=400, detail="Slug already taken")
+        return db_blog, old_slug
+
+    db_blog, old_slug = await write_queue.submit(apply_update)
+    invalidate_blog(db_blog.id)
+    invalidate_slug(old_slug)
+    if not db_blog.is_delete:
+        slug_map.set(db_blog.slug, db_blog.id)
     return BlogRead.from_orm(db_blog)
 
 
+# The photo is stored before the blog row is touched, so the write transaction
+# never spans the upload.
+@router.post("/blogs/{blog_id}/photo", response_model=PhotoRead)
+async def upload_blog_photo(
+        blog_id: int,
+        request: Request,
+        session: AsyncSession = Depends(get_read_session),
+        token: str = Depends(oauth2_scheme)
+) -> PhotoRead:
+    current_user = await get_current_user(session=session, token=token)
+    check_admin_user(current_user)
+    async with session as sess:
+        result = await sess.execute(select(Blog.id).where(Blog.id == blog_id, LIVE_BLOG_FILTER))
+        if result.scalar() is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+    photo = await save_photo(request.headers.get("content-type", ""), request.stream())
+
+    async def set_photo(sess: AsyncSession):
+        result = await sess.execute(
+            update(Blog)
+            .where(Blog.id == blog_id, LIVE_BLOG_FILTER)
+            .values(blog_photo=photo.url, modified=datetime.utcnow())
+            .returning(Blog.id)
+        )
+        if result.scalar() is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+
+    await write_queue.submit(set_photo)
+    invalidate_blog(blog_id)
+    return photo
+
+
 @router.delete("/blogs/{blog_id}", response_model=BlogDelete)
 async def delete_blog(
         blog_id: int,
-        session: AsyncSession = Depends(get_session),
+        session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> BlogDelete:
     current_user = await get_current_user(session=session, token=token)
     check_admin_user(current_user)
-    async with session as sess:
-        blog = await sess.get(Blog, blog_id)
-        if not blog:
+
+    async def mark_deleted(sess: AsyncSession) -> str:
+        result = await sess.execute(
+            update(Blog)
+            .where(Blog.id == blog_id, LIVE_BLOG_FILTER)
+            .values(is_delete=True, modified=datetime.utcnow())
+            .returning(Blog.slug, Blog.save_type)
+        )
+        row = result.first()
+        if row is None:
             raise HTTPException(status_code=404, detail="Blog not found")
-        await sess.delete(blog)
-        await sess.commit()
+        slug, save_type = row
+        await bump_counters(sess, blog_deltas(save_type, -1))
+        return slug
+
+    slug = await write_queue.submit(mark_deleted)
+    invalidate_blog(blog_id)
+    invalidate_slug(slug)
     return BlogDelete(ok=True)
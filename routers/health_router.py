@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db_config import get_read_session
+
+router = APIRouter()
+
+
+@router.get("/health")
+async def read_health() -> dict:
+    return {"status": "ok"}
+
+
+# Ready once the lifespan has finished starting up and the database answers;
+# a worker that is shutting down reports not ready so it is taken out of rotation.
+@router.get("/ready")
+async def read_ready(request: Request, session: AsyncSession = Depends(get_read_session)):
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    try:
+        async with session as sess:
+            await sess.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        return JSONResponse({"status": "database unavailable"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready"}
@@ -0,0 +1,25 @@
+import os
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from services.http_cache_service import is_not_modified
+from services.photo_service import MEDIA_NAME, MEDIA_TYPES, media_path
+
+router = APIRouter()
+
+
+# File names are content addressed, so a name never changes meaning: the digest
+# is the ETag and clients may cache for a year. FileResponse streams the file
+# from disk and answers Range requests.
+@router.get("/media/{name}")
+async def read_media(name: str, request: Request):
+    match = MEDIA_NAME.match(name)
+    path = media_path(name)
+    if not match or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    headers = {
+        "ETag": f'"{name.rsplit(".", 1)[0]}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if is_not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type=MEDIA_TYPES[match.group(2)], headers=headers)
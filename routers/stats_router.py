@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db_config import get_read_session, write_queue
+from routers.authenticate import get_current_user, oauth2_scheme
+from routers.blog_router import check_admin_user
+from services.author_service import author_cache
+from services.blog_cache_service import blog_cache
+from services.invalidation_service import invalidations
+from services.last_login_service import last_login_buffer
+from services.password_service import password_hasher
+from services.principal_service import principal_cache
+from services.slug_service import slug_map
+
+router = APIRouter()
+
+
+@router.get("/stats/")
+async def read_stats(
+        session: AsyncSession = Depends(get_read_session),
+        token: str = Depends(oauth2_scheme)
+) -> dict:
+    current_user = await get_current_user(session=session, token=token)
+    check_admin_user(current_user)
+    return {
+        "password_hasher": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "blog_cache": blog_cache.stats(),
+        "slug_map": slug_map.stats(),
+        "author_cache": author_cache.stats(),
+        "last_login": last_login_buffer.stats(),
+        "write_queue": write_queue.stats(),
+        "invalidations": invalidations.stats(),
+    }
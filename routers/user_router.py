@@ -1,37 +1,94 @@
 import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated, List, Type
+from typing import Annotated, List, Optional, Type, Union
+from sqlalchemy import and_, false, true, update
 from sqlmodel import select
 from models.user_model import USER
 from schemas.user_schema import (
     UserRead, BaseUserCreate, BaseUserUpdate, StaffUserUpdate, SuperuserUpdate, OwnerUpdate,
-    OwnerRead, SuperuserRead, StaffUserRead, UserDelete
+    OwnerRead, SuperuserRead, StaffUserRead, UserDelete, UserBulkResult
 )
-from config.db_config import get_session
+from config.app_config import USER_BULK_BATCH_SIZE
+from config.db_config import get_read_session, write_queue
 from routers.authenticate import oauth2_scheme, get_password_hash, get_current_user
+from services.author_service import invalidate_author
+from services.counter_service import (
+    USERS_ALL, bump_counters, read_counter, user_deltas, user_role, user_role_key
+)
+from services.export_service import ExportFormat, export_response
+from services.import_service import import_users
+from services.pagination_service import encode_cursor, decode_cursor
+from services.principal_service import Principal, invalidate_principal
+from services.serialization_service import CountedList, json_list_response
 import uuid
 
 router = APIRouter()
 
+ROLE_FIELDS = ("is_owner", "is_superuser", "is_staff")
+
+
+# The access rule is part of the UPDATE's WHERE clause, so the principal check,
+# the write and the read-back are one statement. The target is only loaded again
+# when nothing matched, to tell a missing user from a forbidden one.
+async def update_user_helper(user_id: int, user_data: dict, current_user: Principal) -> Type[USER]:
+    if 'password' in user_data:
+        user_data['pass_per_save'] = user_data['password']
+        user_data['password'] = await get_password_hash(user_data['password'])
+    criteria = (USER.id == user_id, access_filter(current_user))
+    if user_data:
+        statement = update(USER).where(*criteria).values(**user_data).returning(USER)
+    else:
+        statement = select(USER).where(*criteria)
+
+    async def apply_update(sess: AsyncSession) -> Type[USER]:
+        old_role = None
+        if any(field in user_data for field in ROLE_FIELDS):
+            result = await sess.execute(
+                select(*(getattr(USER, field) for field in ROLE_FIELDS)).where(USER.id == user_id)
+            )
+            old_flags = result.first()
+            old_role = old_flags and user_role(*old_flags)
+        result = await sess.execute(statement)
+        db_user = result.scalars().first()
+        if db_user is None:
+            target_user = await sess.get(USER, user_id)
+            if not target_user:
+                raise HTTPException(status_code=404, detail="User not found")
+            check_access_level(current_user, target_user)
+        new_role = user_role(db_user.is_owner, db_user.is_superuser, db_user.is_staff)
+        if old_role and old_role != new_role:
+            await bump_counters(sess, {user_role_key(old_role): -1, user_role_key(new_role): 1})
+        return db_user
+
+    db_user = await write_queue.submit(apply_update)
+    invalidate_principal(db_user.username)
+    invalidate_author(db_user.id)
+    return db_user
+
 
-async def update_user_helper(user_id: int, user_data: dict, session: AsyncSession) -> Type[USER]:
+async def read_users_helper(
+        offset: int, limit: int, cursor: Optional[str], response: Response, session: AsyncSession
+) -> tuple[List[USER], int]:
+    statement = select(USER).order_by(USER.id).limit(limit)
+    if cursor:
+        user_id, = decode_cursor(cursor, 1)
+        if not isinstance(user_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        statement = statement.where(USER.id > user_id)
+    else:
+        statement = statement.offset(offset)
     async with session as sess:
-        db_user = await sess.get(USER, user_id)
-        if not db_user:
-            raise HTTPException(status_code=404, detail="User not found")
-        if 'password' in user_data:
-            user_data['pass_per_save'] = user_data['password']
-            user_data['password'] = get_password_hash(user_data['password'])
-        for key, value in user_data.items():
-            setattr(db_user, key, value)
-        sess.add(db_user)
-        await sess.commit()
-        await sess.refresh(db_user)
-    return db_user
+        result = await sess.execute(statement)
+        users = result.scalars().all()
+        total = await read_counter(sess, USERS_ALL)
+    response.headers["X-Total-Count"] = str(total)
+    if users and len(users) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(users[-1].id)
+    return users, total
 
 
-def check_access_level(current_user: USER, target_user: Type[USER]):
+def check_access_level(current_user: Principal, target_user: Type[USER]):
     if current_user.is_owner:
         return True
     if current_user.is_superuser and not target_user.is_owner:
@@ -44,7 +101,17 @@ def check_access_level(current_user: USER, target_user: Type[USER]):
     )
 
 
-async def get_and_check_user(user_id: int, current_user: USER, session: AsyncSession) -> Type[USER] | None:
+def access_filter(current_user: Principal):
+    if current_user.is_owner:
+        return true()
+    if current_user.is_superuser:
+        return USER.is_owner.is_not(True)
+    if current_user.is_staff:
+        return and_(USER.is_owner.is_not(True), USER.is_superuser.is_not(True))
+    return false()
+
+
+async def get_and_check_user(user_id: int, current_user: Principal, session: AsyncSession) -> Type[USER] | None:
     async with session as sess:
         db_user = await sess.get(USER, user_id)
         if not db_user:
@@ -75,7 +142,7 @@ async def check_unique_fields(username: str, email: str, phone_number: str, sess
 
 @router.get("/normalusers/{user_id}", response_model=UserRead)
 async def read_normal_user(
-        user_id: int, session: AsyncSession = Depends(get_session),
+        user_id: int, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> UserRead:
     current_user = await get_current_user(session=session, token=token)
@@ -89,12 +156,15 @@ async def read_normal_user(
     return UserRead.from_orm(user)
 
 
-@router.get("/normalusers/", response_model=List[UserRead])
+@router.get("/normalusers/", response_model=Union[List[UserRead], CountedList[UserRead]])
 async def read_normal_users(
-        session: AsyncSession = Depends(get_session),
+        response: Response,
+        session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme),
-        offset: int = 0,
-        limit: Annotated[int, Query(le=100)] = 100,
+        offset: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=100)] = 100,
+        cursor: Optional[str] = None,
+        with_count: bool = False,
 ) -> List[UserRead]:
     current_user = await get_current_user(session=session, token=token)
 
@@ -103,19 +173,18 @@ async def read_normal_users(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to view users"
         )
-    async with session as sess:
-        result = await sess.execute(select(USER).offset(offset).limit(limit))
-        users = result.scalars().all()
-    return [UserRead.from_orm(user) for user in users]
+    users, total = await read_users_helper(offset, limit, cursor, response, session)
+    return json_list_response(UserRead, users, response.headers, total if with_count else None)
 
 
 @router.post("/users/", response_model=UserRead)
 async def create_user(
-        user: BaseUserCreate, session: AsyncSession = Depends(get_session),
+        user: BaseUserCreate, session: AsyncSession = Depends(get_read_session),
 ) -> UserRead:
     await check_unique_fields(user.username, user.email, user.phone_number, session)
-    hashed_password = get_password_hash(user.password)
-    async with session as sess:
+    hashed_password = await get_password_hash(user.password)
+
+    async def insert_user(sess: AsyncSession) -> USER:
         db_user = USER(
             username=user.username,
             first_name=user.first_name,
@@ -134,27 +203,45 @@ async def create_user(
             is_owner=False,
         )
         sess.add(db_user)
-        await sess.commit()
-        await sess.refresh(db_user)
+        await bump_counters(sess, user_deltas("normal", 1))
+        await sess.flush()
+        return db_user
+
+    db_user = await write_queue.submit(insert_user)
     return UserRead.from_orm(db_user)
 
 
+@router.post("/users/bulk", response_model=UserBulkResult)
+async def create_users_bulk(
+        users: List[BaseUserCreate], session: AsyncSession = Depends(get_read_session),
+        token: str = Depends(oauth2_scheme),
+        batch_size: Annotated[int, Query(ge=1, le=5000)] = USER_BULK_BATCH_SIZE,
+) -> UserBulkResult:
+    current_user = await get_current_user(session=session, token=token)
+
+    if not (current_user.is_staff or current_user.is_superuser or current_user.is_owner):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to create users"
+        )
+    return await import_users(session, users, batch_size)
+
+
 @router.put("/normalusers/{user_id}", response_model=UserRead)
 async def update_normal_user(
-        user_id: int, user: BaseUserUpdate, session: AsyncSession = Depends(get_session),
+        user_id: int, user: BaseUserUpdate, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> UserRead:
     current_user = await get_current_user(session=session, token=token)
 
-    db_user = await get_and_check_user(user_id, current_user, session)
     user_data = user.dict(exclude_unset=True)
-    updated_user = await update_user_helper(user_id, user_data, session)
-    return BaseUserUpdate.from_orm(updated_user)
+    updated_user = await update_user_helper(user_id, user_data, current_user)
+    return UserRead.from_orm(updated_user)
 
 
 @router.get("/staffusers/{user_id}", response_model=StaffUserRead)
 async def read_staff_user(
-        user_id: int, session: AsyncSession = Depends(get_session),
+        user_id: int, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> StaffUserRead:
     current_user = await get_current_user(session=session, token=token)
@@ -168,12 +255,15 @@ async def read_staff_user(
     return StaffUserRead.from_orm(user)
 
 
-@router.get("/staffusers/", response_model=List[StaffUserRead])
+@router.get("/staffusers/", response_model=Union[List[StaffUserRead], CountedList[StaffUserRead]])
 async def read_staff_users(
-        session: AsyncSession = Depends(get_session),
+        response: Response,
+        session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme),
-        offset: int = 0,
-        limit: Annotated[int, Query(le=100)] = 100,
+        offset: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=100)] = 100,
+        cursor: Optional[str] = None,
+        with_count: bool = False,
 ) -> List[StaffUserRead]:
     current_user = await get_current_user(session=session, token=token)
 
@@ -182,15 +272,13 @@ async def read_staff_users(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to view users"
         )
-    async with session as sess:
-        result = await sess.execute(select(USER).offset(offset).limit(limit))
-        users = result.scalars().all()
-    return [StaffUserRead.from_orm(user) for user in users]
+    users, total = await read_users_helper(offset, limit, cursor, response, session)
+    return json_list_response(StaffUserRead, users, response.headers, total if with_count else None)
 
 
 @router.post("/staffusers/", response_model=StaffUserRead)
 async def create_staff_user(
-        user: BaseUserCreate, session: AsyncSession = Depends(get_session),
+        user: BaseUserCreate, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> StaffUserRead:
     current_user = await get_current_user(session=session, token=token)
@@ -201,8 +289,9 @@ async def create_staff_user(
             detail="Only superusers can create staff users"
         )
     await check_unique_fields(user.username, user.email, user.phone_number, session)
-    hashed_password = get_password_hash(user.password)
-    async with session as sess:
+    hashed_password = await get_password_hash(user.password)
+
+    async def insert_user(sess: AsyncSession) -> USER:
         db_user = USER(
             username=user.username,
             first_name=user.first_name,
@@ -221,27 +310,29 @@ async def create_staff_user(
             is_owner=False,
         )
         sess.add(db_user)
-        await sess.commit()
-        await sess.refresh(db_user)
+        await bump_counters(sess, user_deltas("staff", 1))
+        await sess.flush()
+        return db_user
+
+    db_user = await write_queue.submit(insert_user)
     return StaffUserRead.from_orm(db_user)
 
 
 @router.put("/staffusers/{user_id}", response_model=StaffUserRead)
 async def update_staff_user(
-        user_id: int, user: StaffUserUpdate, session: AsyncSession = Depends(get_session),
+        user_id: int, user: StaffUserUpdate, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> StaffUserRead:
     current_user = await get_current_user(session=session, token=token)
 
-    db_user = await get_and_check_user(user_id, current_user, session)
     user_data = user.dict(exclude_unset=True)
-    updated_user = await update_user_helper(user_id, user_data, session)
+    updated_user = await update_user_helper(user_id, user_data, current_user)
     return StaffUserRead.from_orm(updated_user)
 
 
 @router.get("/superusers/{user_id}", response_model=SuperuserRead)
 async def read_superuser(
-        user_id: int, session: AsyncSession = Depends(get_session),
+        user_id: int, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> SuperuserRead:
     current_user = await get_current_user(session=session, token=token)
@@ -255,12 +346,15 @@ async def read_superuser(
     return SuperuserRead.from_orm(user)
 
 
-@router.get("/superusers/", response_model=List[SuperuserRead])
+@router.get("/superusers/", response_model=Union[List[SuperuserRead], CountedList[SuperuserRead]])
 async def read_superusers(
-        session: AsyncSession = Depends(get_session),
+        response: Response,
+        session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme),
-        offset: int = 0,
-        limit: Annotated[int, Query(le=100)] = 100,
+        offset: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=100)] = 100,
+        cursor: Optional[str] = None,
+        with_count: bool = False,
 ) -> List[SuperuserRead]:
     current_user = await get_current_user(session=session, token=token)
 
@@ -269,15 +363,13 @@ async def read_superusers(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to view users"
         )
-    async with session as sess:
-        result = await sess.execute(select(USER).offset(offset).limit(limit))
-        users = result.scalars().all()
-    return [SuperuserRead.from_orm(user) for user in users]
+    users, total = await read_users_helper(offset, limit, cursor, response, session)
+    return json_list_response(SuperuserRead, users, response.headers, total if with_count else None)
 
 
 @router.post("/superusers/", response_model=SuperuserRead)
 async def create_superuser(
-        user: BaseUserCreate, session: AsyncSession = Depends(get_session),
+        user: BaseUserCreate, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> SuperuserRead:
     current_user = await get_current_user(session=session, token=token)
@@ -288,8 +380,9 @@ async def create_superuser(
             detail="Only owners can create superusers"
         )
     await check_unique_fields(user.username, user.email, user.phone_number, session)
-    hashed_password = get_password_hash(user.password)
-    async with session as sess:
+    hashed_password = await get_password_hash(user.password)
+
+    async def insert_user(sess: AsyncSession) -> USER:
         db_user = USER(
             username=user.username,
             first_name=user.first_name,
@@ -308,27 +401,45 @@ async def create_superuser(
             is_owner=False,
         )
         sess.add(db_user)
-        await sess.commit()
-        await sess.refresh(db_user)
+        await bump_counters(sess, user_deltas("superuser", 1))
+        await sess.flush()
+        return db_user
+
+    db_user = await write_queue.submit(insert_user)
     return SuperuserRead.from_orm(db_user)
 
 
 @router.put("/superusers/{user_id}", response_model=SuperuserRead)
 async def update_superuser(
-        user_id: int, user: SuperuserUpdate, session: AsyncSession = Depends(get_session),
+        user_id: int, user: SuperuserUpdate, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> SuperuserRead:
     current_user = await get_current_user(session=session, token=token)
 
-    db_user = await get_and_check_user(user_id, current_user, session)
     user_data = user.dict(exclude_unset=True)
-    updated_user = await update_user_helper(user_id, user_data, session)
+    updated_user = await update_user_helper(user_id, user_data, current_user)
     return SuperuserRead.from_orm(updated_user)
 
 
+@router.get("/owner/users/export")
+async def export_owner_users(
+        session: AsyncSession = Depends(get_read_session),
+        token: str = Depends(oauth2_scheme),
+        format: ExportFormat = "ndjson",
+):
+    current_user = await get_current_user(session=session, token=token)
+
+    if not current_user.is_owner:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to view users"
+        )
+    return export_response(select(USER).order_by(USER.id), OwnerRead, format, "users")
+
+
 @router.get("/owner/users/{user_id}", response_model=OwnerRead)
 async def read_owner_user(
-        user_id: int, session: AsyncSession = Depends(get_session),
+        user_id: int, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> OwnerRead:
     current_user = await get_current_user(session=session, token=token)
@@ -342,12 +453,15 @@ async def read_owner_user(
     return OwnerRead.from_orm(user)
 
 
-@router.get("/owner/users/", response_model=List[OwnerRead])
+@router.get("/owner/users/", response_model=Union[List[OwnerRead], CountedList[OwnerRead]])
 async def read_owner_users(
-        session: AsyncSession = Depends(get_session),
+        response: Response,
+        session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme),
-        offset: int = 0,
-        limit: Annotated[int, Query(le=100)] = 100,
+        offset: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=100)] = 100,
+        cursor: Optional[str] = None,
+        with_count: bool = False,
 ) -> List[OwnerRead]:
     current_user = await get_current_user(session=session, token=token)
 
@@ -356,30 +470,28 @@ async def read_owner_users(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to view users"
         )
-    async with session as sess:
-        result = await sess.execute(select(USER).offset(offset).limit(limit))
-        users = result.scalars().all()
-    return [OwnerRead.from_orm(user) for user in users]
+    users, total = await read_users_helper(offset, limit, cursor, response, session)
+    return json_list_response(OwnerRead, users, response.headers, total if with_count else None)
 
 
 @router.put("/owners/{user_id}", response_model=OwnerRead)
 async def update_owner(
-        user_id: int, user: OwnerUpdate, session: AsyncSession = Depends(get_session),
+        user_id: int, user: OwnerUpdate, session: AsyncSession = Depends(get_read_session),
         token: str = Depends(oauth2_scheme)
 ) -> OwnerRead:
     current_user = await get_current_user(session=session, token=token)
 
-    db_user = await get_and_check_user(user_id, current_user, session)
     user_data = user.dict(exclude_unset=True)
-    updated_user = await update_user_helper(user_id, user_data, session)
+    updated_user = await update_user_helper(user_id, user_data, current_user)
     return OwnerRead.from_orm(updated_user)
 
 
 @router.delete("/users/{user_id}", response_model=UserDelete)
-async def delete_user(user_id: int, session: AsyncSession = Depends(get_session),
+async def delete_user(user_id: int, session: AsyncSession = Depends(get_read_session),
                       token: str = Depends(oauth2_scheme)) -> UserDelete:
     current_user = await get_current_user(session=session, token=token)
-    async with session as sess:
+
+    async def remove_user(sess: AsyncSession) -> USER:
         user = await sess.get(USER, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -390,5 +502,10 @@ async def delete_user(user_id: int, session: AsyncSession = Depends(get_session)
             )
         check_access_level(current_user, user)
         await sess.delete(user)
-        await sess.commit()
+        await bump_counters(sess, user_deltas(user_role(user.is_owner, user.is_superuser, user.is_staff), -1))
+        return user
+
+    user = await write_queue.submit(remove_user)
+    invalidate_principal(user.username)
+    invalidate_author(user_id)
     return UserDelete(ok=True)
@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
+from schemas.user_schema import AuthorRead
 
 
 class BlogCreate(BaseModel):
@@ -30,6 +31,34 @@ class BlogRead(BaseModel):
         from_attributes = True
 
 
+class BlogWithAuthorRead(BlogRead):
+    author_detail: Optional[AuthorRead] = None
+
+
+class BlogSummaryRead(BaseModel):
+    id: int
+    title: str
+    slug: str
+    blog_photo: Optional[str] = None
+    short_description: Optional[str] = None
+    save_type: str
+    author: Optional[int] = None
+    created: datetime
+    modified: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class BlogSummaryWithAuthorRead(BlogSummaryRead):
+    author_detail: Optional[AuthorRead] = None
+
+
+class BlogSearchRead(BlogSummaryRead):
+    rank: float
+    snippet: str
+
+
 class BlogUpdate(BaseModel):
     title: Optional[str] = None
     slug: Optional[str] = None
@@ -43,6 +72,27 @@ class BlogUpdate(BaseModel):
         from_attributes = True
 
 
+class BlogBulkError(BaseModel):
+    line: int
+    detail: str
+
+
+class BlogBulkResult(BaseModel):
+    inserted: int
+    errors: List[BlogBulkError]
+
+
+class PhotoVariantRead(BaseModel):
+    width: int
+    url: str
+
+
+class PhotoRead(BaseModel):
+    url: str
+    size: int
+    variants: List[PhotoVariantRead]
+
+
 class BlogDelete(BaseModel):
     ok: Optional[bool] = None
 
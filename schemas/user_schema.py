@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -18,6 +18,22 @@ class BaseUserCreate(BaseModel):
         from_attributes = True
 
 
+class UserBulkError(BaseModel):
+    index: int
+    username: str
+    detail: str
+
+
+class AuthorRead(BaseModel):
+    id: int
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 class BaseUser(BaseModel):
     id: int
     username: str
@@ -39,6 +55,11 @@ class UserRead(BaseUser):
     last_login: Optional[datetime] = None
 
 
+class UserBulkResult(BaseModel):
+    created: List[UserRead]
+    errors: List[UserBulkError]
+
+
 class StaffUserRead(UserRead):
     is_staff: Optional[bool] = None
 
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import select
+import shutil
+import signal
+import socket
+import tempfile
+import time
+
+import uvicorn
+
+from config.app_config import (
+    SERVE_HOST, SERVE_PORT, SERVE_WORKERS, SERVE_READY_TIMEOUT, SERVE_GRACEFUL_TIMEOUT, SERVE_INVALIDATION_SLOTS
+)
+from config.db_config import prepare_database
+from services.invalidation_service import invalidations
+from services.metrics_service import metrics
+
+logger = logging.getLogger("serve")
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+# Runs in the forked child. uvicorn installs its own SIGINT/SIGTERM handlers and
+# drains in-flight requests on SIGTERM; the parent's SIGHUP and SIGCHLD handlers
+# are reset so they do not leak into the worker.
+def run_worker(app, sock: socket.socket, worker_id: int, ready_fd: int):
+    for signum in (signal.SIGHUP, signal.SIGCHLD, signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+    app.state.worker_id = worker_id
+    server = uvicorn.Server(uvicorn.Config(
+        app, lifespan="on", timeout_graceful_shutdown=SERVE_GRACEFUL_TIMEOUT, access_log=False,
+    ))
+
+    async def notify_ready():
+        while not server.started:
+            if server.should_exit:
+                return
+            await asyncio.sleep(0.05)
+        os.write(ready_fd, b"1")
+        os.close(ready_fd)
+
+    async def run():
+        notifier = asyncio.create_task(notify_ready())
+        await server.serve(sockets=[sock])
+        notifier.cancel()
+
+    asyncio.run(run())
+
+
+class Supervisor:
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.size = max(1, workers)
+        self.workers = {}
+        self.retiring = set()
+        self.reload_requested = False
+        self.stopping = False
+
+    def spawn(self, worker_id: int) -> tuple[int, int]:
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            code = 0
+            try:
+                run_worker(self.app, self.sock, worker_id, ready_write)
+            except BaseException:
+                logger.exception("worker %s crashed", worker_id)
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(ready_write)
+        self.workers[pid] = worker_id
+        logger.info("started worker %s (pid %s)", worker_id, pid)
+        return pid, ready_read
+
+    @staticmethod
+    def wait_ready(ready_read: int, timeout: float) -> bool:
+        try:
+            readable, _, _ = select.select([ready_read], [], [], timeout)
+            return bool(readable) and os.read(ready_read, 1) == b"1"
+        finally:
+            os.close(ready_read)
+
+    def stop_worker(self, pid: int, timeout: float):
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                break
+            time.sleep(0.1)
+        else:
+            logger.warning("worker pid %s did not stop in %.0fs, killing it", pid, timeout)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+        self.retiring.discard(pid)
+
+    # Each worker is replaced only after its successor reports ready, so the
+    # socket keeps being served throughout. A successor that never becomes ready
+    # aborts the restart and leaves the remaining old workers running.
+    def rolling_restart(self):
+        logger.info("rolling restart of %s workers", len(self.workers))
+        for pid, worker_id in list(self.workers.items()):
+            new_pid, ready_read = self.spawn(worker_id)
+            if not self.wait_ready(ready_read, SERVE_READY_TIMEOUT):
+                logger.error("worker %s (pid %s) did not become ready, aborting restart", worker_id, new_pid)
+                self.stop_worker(new_pid, SERVE_GRACEFUL_TIMEOUT)
+                return
+            self.stop_worker(pid, SERVE_GRACEFUL_TIMEOUT)
+        logger.info("rolling restart finished")
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker_id = self.workers.pop(pid, None)
+            if worker_id is None or pid in self.retiring or self.stopping:
+                continue
+            logger.warning("worker %s (pid %s) exited with status %s, restarting", worker_id, pid, status)
+            self.spawn(worker_id)
+
+    def shutdown(self):
+        logger.info("stopping %s workers", len(self.workers))
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + SERVE_GRACEFUL_TIMEOUT + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    def run(self):
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "reload_requested", True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "stopping", True))
+        for worker_id in range(self.size):
+            _, ready_read = self.spawn(worker_id)
+            if not self.wait_ready(ready_read, SERVE_READY_TIMEOUT):
+                logger.error("worker %s did not become ready", worker_id)
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                self.rolling_restart()
+            self.reap()
+            time.sleep(0.5)
+        self.shutdown()
+
+
+# The app is imported once in the supervisor so workers share its memory
+# copy-on-write. SIGHUP replaces the workers one at a time; code changes need the
+# supervisor itself to be restarted. The cache invalidation ring and the metrics
+# directory are set up before the first fork so every worker, including
+# replacements, shares them.
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    from main import app
+
+    prepare_database()
+    invalidations.share(SERVE_INVALIDATION_SLOTS)
+    metrics_dir = tempfile.mkdtemp(prefix="metrics-")
+    metrics.share(metrics_dir)
+    sock = bind_socket(SERVE_HOST, SERVE_PORT)
+    logger.info(
+        "listening on %s:%s with %s workers (supervisor pid %s)", SERVE_HOST, SERVE_PORT, SERVE_WORKERS, os.getpid()
+    )
+    try:
+        Supervisor(app, sock, SERVE_WORKERS).run()
+    finally:
+        sock.close()
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
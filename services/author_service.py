@@ -0,0 +1,42 @@
+from typing import Dict, Iterable
+
+from sqlmodel import select
+
+from config.app_config import AUTHOR_CACHE_SIZE, AUTHOR_CACHE_TTL
+from config.db_config import async_read_session
+from models.user_model import USER
+from schemas.user_schema import AuthorRead
+from services.cache_service import TTLCache
+from services.invalidation_service import invalidations
+
+AUTHOR_COLUMNS = [getattr(USER, name) for name in AuthorRead.model_fields]
+
+author_cache = TTLCache(maxsize=AUTHOR_CACHE_SIZE, ttl=AUTHOR_CACHE_TTL)
+invalidations.register("author", lambda key: author_cache.pop(int(key)), author_cache.clear)
+
+
+# Cached summaries are served as is; whatever is missing for the page is fetched
+# with a single IN query, however many posts share or differ in author.
+async def load_authors(author_ids: Iterable[int]) -> Dict[int, AuthorRead]:
+    authors = {}
+    missing = set()
+    for author_id in author_ids:
+        if author_id is None or author_id in authors or author_id in missing:
+            continue
+        author = author_cache.get(author_id)
+        if author is None:
+            missing.add(author_id)
+        else:
+            authors[author_id] = author
+    if missing:
+        async with async_read_session() as sess:
+            result = await sess.execute(select(*AUTHOR_COLUMNS).where(USER.id.in_(missing)))
+            for row in result:
+                author = AuthorRead.model_validate(row)
+                author_cache.set(author.id, author)
+                authors[author.id] = author
+    return authors
+
+
+def invalidate_author(user_id: int):
+    invalidations.publish("author", str(user_id))
@@ -0,0 +1,56 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlmodel import select
+
+from config.app_config import BLOG_CACHE_SIZE, BLOG_CACHE_TTL
+from config.db_config import async_read_session
+from models.blog_model import Blog, LIVE_BLOG_FILTER
+from schemas.blog_schema import BlogRead
+from services.cache_service import TTLCache
+from services.compression_service import compress_variants
+from services.http_cache_service import make_etag
+from services.invalidation_service import invalidations
+
+
+@dataclass(frozen=True, slots=True)
+class CachedBlog:
+    slug: str
+    etag: str
+    modified: datetime
+    body: bytes
+    author: Optional[int] = None
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+
+blog_cache = TTLCache(maxsize=BLOG_CACHE_SIZE, ttl=BLOG_CACHE_TTL)
+invalidations.register("blog", lambda key: blog_cache.pop(int(key)), blog_cache.clear)
+
+
+async def _load_blog(blog_id: int) -> Optional[CachedBlog]:
+    async with async_read_session() as sess:
+        result = await sess.execute(select(Blog).where(Blog.id == blog_id, LIVE_BLOG_FILTER))
+        blog = result.scalars().first()
+    if not blog:
+        return None
+    body = BlogRead.from_orm(blog).model_dump_json().encode()
+    # Compressed once per id and modified time; an edit invalidates the entry, so
+    # the variants are rebuilt together with the body on the next read.
+    return CachedBlog(
+        slug=blog.slug,
+        etag=make_etag(blog.id, blog.modified.isoformat()),
+        modified=blog.modified,
+        body=body,
+        author=blog.author,
+        variants=await asyncio.to_thread(compress_variants, body),
+    )
+
+
+async def get_cached_blog(blog_id: int) -> Optional[CachedBlog]:
+    return await blog_cache.get_or_load(blog_id, lambda: _load_blog(blog_id))
+
+
+def invalidate_blog(blog_id: int):
+    invalidations.publish("blog", str(blog_id))
@@ -0,0 +1,59 @@
+import gzip
+from typing import Dict, Mapping, Optional
+
+from config.app_config import BROTLI_QUALITY, COMPRESS_MIN_SIZE, GZIP_LEVEL
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Listed in order of preference when the client weighs encodings equally.
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    if len(body) < COMPRESS_MIN_SIZE:
+        return {}
+    variants = {"gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli:
+        variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    weights = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: Optional[str], variants: Mapping[str, bytes]) -> Optional[str]:
+    if not accept_encoding or not variants:
+        return None
+    weights = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        if encoding not in variants:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    if encoding is None:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
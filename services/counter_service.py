@@ -0,0 +1,95 @@
+import asyncio
+from collections import Counter as Tally
+from typing import Mapping, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.blog_model import Blog, LIVE_BLOG_FILTER
+from models.counter_model import Counter
+from models.user_model import USER
+
+BLOGS_ALL = "blogs:all"
+USERS_ALL = "users:all"
+
+
+def blog_save_type_key(save_type: str) -> str:
+    return f"blogs:save_type:{save_type}"
+
+
+def blog_count_key(save_type: Optional[str] = None) -> str:
+    return BLOGS_ALL if save_type is None else blog_save_type_key(save_type)
+
+
+def blog_deltas(save_type: str, delta: int) -> dict:
+    return {BLOGS_ALL: delta, blog_save_type_key(save_type): delta}
+
+
+def user_role(is_owner: Optional[bool], is_superuser: Optional[bool], is_staff: Optional[bool]) -> str:
+    if is_owner:
+        return "owner"
+    if is_superuser:
+        return "superuser"
+    if is_staff:
+        return "staff"
+    return "normal"
+
+
+def user_role_key(role: str) -> str:
+    return f"users:role:{role}"
+
+
+def user_deltas(role: str, delta: int) -> dict:
+    return {USERS_ALL: delta, user_role_key(role): delta}
+
+
+# Counters are bumped with the caller's session before it commits, so they move in
+# the same transaction as the rows they count.
+async def bump_counters(sess: AsyncSession, deltas: Mapping[str, int]):
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    statement = sqlite_insert(Counter).values([{"key": key, "value": delta} for key, delta in deltas.items()])
+    statement = statement.on_conflict_do_update(
+        index_elements=[Counter.key], set_={"value": Counter.value + statement.excluded.value}
+    )
+    await sess.execute(statement)
+
+
+async def read_counter(sess: AsyncSession, key: str) -> int:
+    result = await sess.execute(select(Counter.value).where(Counter.key == key))
+    return result.scalar() or 0
+
+
+async def rebuild_counters(sess: AsyncSession) -> dict:
+    counts = Tally()
+    result = await sess.execute(
+        select(Blog.save_type, func.count()).where(LIVE_BLOG_FILTER).group_by(Blog.save_type)
+    )
+    for save_type, count in result:
+        counts.update(blog_deltas(save_type, count))
+    result = await sess.execute(
+        select(USER.is_owner, USER.is_superuser, USER.is_staff, func.count())
+        .group_by(USER.is_owner, USER.is_superuser, USER.is_staff)
+    )
+    for is_owner, is_superuser, is_staff, count in result:
+        counts.update(user_deltas(user_role(is_owner, is_superuser, is_staff), count))
+    await sess.execute(delete(Counter))
+    if counts:
+        await sess.execute(insert(Counter), [{"key": key, "value": value} for key, value in counts.items()])
+    await sess.commit()
+    return dict(counts)
+
+
+async def main():
+    from config.db_config import async_session
+
+    async with async_session() as sess:
+        counts = await rebuild_counters(sess)
+    for key, value in sorted(counts.items()):
+        print(f"{key} = {value}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
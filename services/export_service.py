@@ -0,0 +1,54 @@
+import csv
+import io
+from typing import AsyncIterator, Literal, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+
+from config.app_config import EXPORT_CHUNK_SIZE
+from config.db_config import async_read_session
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _ndjson_chunk(schema: Type[BaseModel], objects) -> bytes:
+    return b"".join(schema.model_validate(obj).model_dump_json().encode() + b"\n" for obj in objects)
+
+
+def _csv_chunk(schema: Type[BaseModel], objects, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(schema.model_fields))
+    if header:
+        writer.writeheader()
+    for obj in objects:
+        writer.writerow(schema.model_validate(obj).model_dump(mode="json"))
+    return buffer.getvalue().encode()
+
+
+# The export owns its session because the request's session dependency is closed
+# before a StreamingResponse body is sent. Rows are pulled from the server-side
+# cursor one partition at a time, so memory stays flat whatever the table size.
+async def stream_export(statement: Select, schema: Type[BaseModel], fmt: ExportFormat) -> AsyncIterator[bytes]:
+    async with async_read_session() as sess:
+        result = await sess.stream_scalars(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        if fmt == "csv":
+            yield _csv_chunk(schema, [], header=True)
+        async for partition in result.partitions():
+            if fmt == "csv":
+                yield _csv_chunk(schema, partition, header=False)
+            else:
+                yield _ndjson_chunk(schema, partition)
+
+
+def export_response(statement: Select, schema: Type[BaseModel], fmt: ExportFormat, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(statement, schema, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
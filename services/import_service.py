@@ -0,0 +1,202 @@
+import uuid
+from collections import Counter as Tally
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from config.db_config import write_queue
+from models.blog_model import Blog, LIVE_BLOG_FILTER
+from models.user_model import USER
+from schemas.blog_schema import BlogCreate, BlogBulkError, BlogBulkResult
+from schemas.user_schema import BaseUserCreate, UserRead, UserBulkError, UserBulkResult
+from services.counter_service import blog_deltas, bump_counters, user_deltas
+from services.password_service import password_hasher
+
+BLOG_CREATE_FIELDS = list(BlogCreate.model_fields)
+INSERT_BLOGS = 'INSERT INTO "Blogs" ({}, created, modified, is_delete) VALUES ({}, ?, ?, 0)'.format(
+    ", ".join(BLOG_CREATE_FIELDS), ", ".join("?" * len(BLOG_CREATE_FIELDS))
+)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    buffer = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            line_number += 1
+            yield line_number, bytes(buffer[start:end])
+            start = end + 1
+        del buffer[:start]
+    if buffer:
+        yield line_number + 1, bytes(buffer)
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc'])) or 'body'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+async def insert_blog_batch(
+        sess: AsyncSession, batch: List[tuple[int, BlogCreate]], errors: List[BlogBulkError]
+) -> int:
+    slugs = [blog.slug for _, blog in batch]
+    result = await sess.execute(select(Blog.slug).where(Blog.slug.in_(slugs), LIVE_BLOG_FILTER))
+    taken = set(result.scalars())
+    conn = await sess.connection()
+    created_type = Blog.__table__.c.created.type.dialect_impl(conn.dialect)
+    now = created_type.bind_processor(conn.dialect)(datetime.utcnow())
+    rows, lines = [], []
+    deltas = Tally()
+    for line, blog in batch:
+        if blog.slug in taken:
+            errors.append(BlogBulkError(line=line, detail="Slug already taken"))
+            continue
+        taken.add(blog.slug)
+        rows.append((*(getattr(blog, field) for field in BLOG_CREATE_FIELDS), now, now))
+        lines.append(line)
+        deltas.update(blog_deltas(blog.save_type, 1))
+    if not rows:
+        return 0
+    # A driver-level executemany skips SQLAlchemy's per-row parameter processing,
+    # which otherwise costs more than the INSERT itself. Like the user chunks,
+    # this runs as a write job and a rejected batch only rolls back its SAVEPOINT.
+    try:
+        async with sess.begin_nested():
+            await conn.exec_driver_sql(INSERT_BLOGS, rows)
+            await bump_counters(sess, deltas)
+    except IntegrityError as exc:
+        errors.extend(BlogBulkError(line=line, detail=f"Batch rejected: {exc.orig}") for line in lines)
+        return 0
+    return len(rows)
+
+
+async def submit_blog_batch(batch: List[tuple[int, BlogCreate]], errors: List[BlogBulkError]) -> int:
+    return await write_queue.submit(lambda sess: insert_blog_batch(sess, batch, errors))
+
+
+# Rows are parsed as they arrive and each batch is submitted to the writer as
+# its own job, so neither the request body nor the whole import is ever held in
+# memory, and the write lock is only held while a batch is inserted.
+async def import_blogs(chunks: AsyncIterator[bytes], batch_size: int) -> BlogBulkResult:
+    inserted = 0
+    errors: List[BlogBulkError] = []
+    batch: List[tuple[int, BlogCreate]] = []
+    async for line, raw in iter_lines(chunks):
+        if not raw.strip():
+            continue
+        try:
+            batch.append((line, BlogCreate.model_validate_json(raw)))
+        except ValidationError as exc:
+            errors.append(BlogBulkError(line=line, detail=format_validation_error(exc)))
+            continue
+        if len(batch) >= batch_size:
+            inserted += await submit_blog_batch(batch, errors)
+            batch = []
+    if batch:
+        inserted += await submit_blog_batch(batch, errors)
+    return BlogBulkResult(inserted=inserted, errors=errors)
+
+
+async def find_user_conflicts(
+        sess: AsyncSession, users: List[BaseUserCreate]
+) -> List[Optional[str]]:
+    usernames = {user.username for user in users}
+    emails = {user.email for user in users if user.email is not None}
+    phone_numbers = {user.phone_number for user in users if user.phone_number is not None}
+    result = await sess.execute(select(USER.username, USER.email, USER.phone_number).where(or_(
+        USER.username.in_(usernames),
+        USER.email.in_(emails),
+        USER.phone_number.in_(phone_numbers),
+    )))
+    taken_usernames, taken_emails, taken_phone_numbers = set(), set(), set()
+    for username, email, phone_number in result:
+        taken_usernames.add(username)
+        taken_emails.add(email)
+        taken_phone_numbers.add(phone_number)
+
+    conflicts = []
+    for user in users:
+        if user.username in taken_usernames:
+            conflicts.append("Username already taken")
+        elif user.email is not None and user.email in taken_emails:
+            conflicts.append("Email already taken")
+        elif user.phone_number is not None and user.phone_number in taken_phone_numbers:
+            conflicts.append("Phone number already taken")
+        else:
+            conflicts.append(None)
+            taken_usernames.add(user.username)
+            taken_emails.add(user.email)
+            taken_phone_numbers.add(user.phone_number)
+    return conflicts
+
+
+async def insert_user_batch(
+        sess: AsyncSession, batch: List[tuple[int, BaseUserCreate, str]], errors: List[UserBulkError]
+) -> List[USER]:
+    now = datetime.now()
+    rows = [
+        {
+            "username": user.username,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "email": user.email,
+            "password": hashed_password,
+            "pass_per_save": user.password,
+            "gender": user.gender,
+            "phone_number": user.phone_number,
+            "bio": user.bio,
+            "custom_user_id": str(uuid.uuid4())[:11:-1],
+            "is_active": True,
+            "is_superuser": False,
+            "is_staff": False,
+            "date_joined": now,
+            "is_owner": False,
+        }
+        for _, user, hashed_password in batch
+    ]
+    # Runs as a write job; the SAVEPOINT lets a rejected chunk roll back without
+    # failing the job, so the other jobs in the writer's batch still commit.
+    try:
+        async with sess.begin_nested():
+            result = await sess.scalars(insert(USER).returning(USER), rows)
+            created = result.all()
+            await bump_counters(sess, user_deltas("normal", len(created)))
+    except IntegrityError as exc:
+        errors.extend(
+            UserBulkError(index=index, username=user.username, detail=f"Batch rejected: {exc.orig}")
+            for index, user, _ in batch
+        )
+        return []
+    return created
+
+
+# Uniqueness is checked for the whole request in one query on a read session and
+# passwords are hashed across the worker pool before anything is written, so no
+# write lock or write connection is held while bcrypt runs. Each chunk is then
+# its own write job.
+async def import_users(session: AsyncSession, users: List[BaseUserCreate], batch_size: int) -> UserBulkResult:
+    errors: List[UserBulkError] = []
+    async with session as sess:
+        conflicts = await find_user_conflicts(sess, users)
+    accepted = []
+    for index, (user, conflict) in enumerate(zip(users, conflicts)):
+        if conflict:
+            errors.append(UserBulkError(index=index, username=user.username, detail=conflict))
+        else:
+            accepted.append((index, user))
+
+    hashed_passwords = await password_hasher.hash_many([user.password for _, user in accepted])
+    records = [(index, user, hashed) for (index, user), hashed in zip(accepted, hashed_passwords)]
+    created: List[USER] = []
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        created.extend(await write_queue.submit(lambda sess: insert_user_batch(sess, batch, errors)))
+    return UserBulkResult(created=[UserRead.from_orm(user) for user in created], errors=errors)
@@ -0,0 +1,125 @@
+import mmap
+import multiprocessing
+import struct
+from typing import Callable, Dict, List, Optional, Tuple
+
+SLOT_SIZE = 256
+HEAD = struct.Struct("<Q")
+LENGTH = struct.Struct("<H")
+CLEAR_ALL = "*"
+
+
+# Caches are per process. Workers forked by serve.py share a ring of
+# invalidation events in anonymous shared memory: a write publishes its event
+# after it commits, and every worker replays the events it has not seen yet
+# before handling its next request. A change is therefore visible on every
+# worker as soon as it is committed, and checking for one costs a read of the
+# ring's head rather than a database round trip. A worker that falls a whole
+# ring behind drops all of its caches instead. Without a ring (a single process)
+# publishing just invalidates locally.
+class InvalidationChannel:
+    def __init__(self):
+        self._handlers: Dict[str, Tuple[Callable[[str], None], Callable[[], None]]] = {}
+        self._ring: Optional[mmap.mmap] = None
+        self._lock = None
+        self._slots = 0
+        self._cursor = 0
+        self.published = 0
+        self.applied = 0
+        self.overflows = 0
+
+    def register(self, kind: str, invalidate: Callable[[str], None], clear: Callable[[], None]):
+        self._handlers[kind] = (invalidate, clear)
+
+    # Called by the supervisor before it forks, so every worker maps the same
+    # memory and shares the lock.
+    def share(self, slots: int):
+        self._slots = slots
+        self._ring = mmap.mmap(-1, HEAD.size + slots * SLOT_SIZE)
+        self._lock = multiprocessing.get_context("fork").Lock()
+        self._cursor = 0
+
+    # A worker starts with empty caches, so it has nothing to replay.
+    def seek_head(self):
+        if self._ring is not None:
+            self._cursor = self._head()
+
+    def _head(self) -> int:
+        return HEAD.unpack_from(self._ring, 0)[0]
+
+    def _offset(self, sequence: int) -> int:
+        return HEAD.size + (sequence % self._slots) * SLOT_SIZE
+
+    def publish(self, kind: str, key: str):
+        self._apply(kind, key)
+        self.published += 1
+        if self._ring is None:
+            return
+        event = f"{kind}\0{key}".encode()
+        if LENGTH.size + len(event) > SLOT_SIZE:
+            event = CLEAR_ALL.encode()
+        with self._lock:
+            head = self._head()
+            offset = self._offset(head)
+            LENGTH.pack_into(self._ring, offset, len(event))
+            self._ring[offset + LENGTH.size:offset + LENGTH.size + len(event)] = event
+            HEAD.pack_into(self._ring, 0, head + 1)
+        if self._cursor == head:
+            self._cursor = head + 1
+
+    def poll(self):
+        if self._ring is None:
+            return
+        head = self._head()
+        if head == self._cursor:
+            return
+        events: List[bytes] = []
+        if head - self._cursor <= self._slots:
+            for sequence in range(self._cursor, head):
+                offset = self._offset(sequence)
+                length, = LENGTH.unpack_from(self._ring, offset)
+                events.append(self._ring[offset + LENGTH.size:offset + LENGTH.size + length])
+        # Slots read above may have been reused by writers while they were copied.
+        if self._head() - self._cursor > self._slots:
+            self.overflows += 1
+            self._cursor = self._head()
+            self._apply(CLEAR_ALL, "")
+            return
+        self._cursor = head
+        for event in events:
+            kind, _, key = event.decode().partition("\0")
+            self._apply(kind, key)
+
+    def _apply(self, kind: str, key: str):
+        self.applied += 1
+        if kind == CLEAR_ALL:
+            for _, clear in self._handlers.values():
+                clear()
+            return
+        handler = self._handlers.get(kind)
+        if handler is not None:
+            handler[0](key)
+
+    def stats(self) -> dict:
+        return {
+            "shared": self._ring is not None,
+            "slots": self._slots,
+            "lag": self._head() - self._cursor if self._ring is not None else 0,
+            "published": self.published,
+            "applied": self.applied,
+            "overflows": self.overflows,
+        }
+
+
+invalidations = InvalidationChannel()
+
+
+# Pure ASGI so the check runs before any cache is read for the request.
+class InvalidationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            invalidations.poll()
+        await self.app(scope, receive, send)
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import bindparam, update
+
+from config.app_config import LAST_LOGIN_FLUSH_INTERVAL, LAST_LOGIN_MAX_PENDING
+from config.db_config import write_queue
+from models.user_model import USER
+
+logger = logging.getLogger(__name__)
+
+# A Core executemany rather than an ORM bulk update: ids of users deleted since
+# their login simply match no row, instead of failing the whole batch on the
+# ORM's row count check.
+UPDATE_LAST_LOGIN = (
+    update(USER.__table__)
+    .where(USER.__table__.c.id == bindparam("user_id"))
+    .values(last_login=bindparam("login_at"))
+)
+
+
+# Logins only record a timestamp in memory; a background task writes every pending
+# timestamp in one executemany UPDATE, so a login storm costs one write job per
+# interval instead of one per login. Only the latest login per user is kept.
+class LastLoginBuffer:
+    def __init__(self, max_pending: int = 1000, max_attempts: int = 3):
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending: Dict[int, datetime] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._failed_attempts = 0
+        self.recorded = 0
+        self.flushes = 0
+        self.flushed = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def record(self, user_id: int, when: datetime):
+        self._pending[user_id] = when
+        self.recorded += 1
+        if len(self._pending) >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        try:
+            await write_queue.submit(lambda sess: sess.execute(
+                UPDATE_LAST_LOGIN, [{"user_id": user_id, "login_at": when} for user_id, when in pending.items()]
+            ))
+        except Exception:
+            self.failures += 1
+            self._failed_attempts += 1
+            # A batch that keeps failing is dropped rather than retried forever,
+            # so it cannot block every later login from being written.
+            if self._failed_attempts < self.max_attempts:
+                self._restore(pending)
+            else:
+                self._failed_attempts = 0
+                self.dropped += len(pending)
+                logger.error(
+                    "Dropping %d last_login timestamps after %d failed flushes", len(pending), self.max_attempts
+                )
+            raise
+        except BaseException:
+            self._restore(pending)
+            raise
+        self._failed_attempts = 0
+        self.flushes += 1
+        self.flushed += len(pending)
+        return len(pending)
+
+    def _restore(self, pending: Dict[int, datetime]):
+        for user_id, when in pending.items():
+            self._pending.setdefault(user_id, when)
+
+    async def run(self, interval: float):
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing last_login timestamps failed")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+
+last_login_buffer = LastLoginBuffer(LAST_LOGIN_MAX_PENDING)
+
+
+async def run_last_login_flush_loop():
+    await last_login_buffer.run(LAST_LOGIN_FLUSH_INTERVAL)
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from services.query_log_service import check_request_budget, check_statement
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+HASH_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WRITE_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+@dataclass(slots=True)
+class RequestMetrics:
+    scope: dict
+    statements: int = 0
+    db_seconds: float = 0.0
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    # Routing stores the matched route in the scope, so statements issued by the
+    # endpoint already see the template.
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+# (attribute, metric name, help text, label names) of every histogram store.
+HISTOGRAMS = (
+    ("latency", "http_request_duration_seconds", "Request latency.", ("method", "route")),
+    ("db_statements", "db_statements_per_request", "SQL statements executed per request.", ("method", "route")),
+    ("db_seconds", "db_seconds_per_request", "Time spent executing SQL per request.", ("method", "route")),
+    ("password_hash", "password_hash_seconds", "Password hashing time spent queued and running.",
+     ("operation", "phase")),
+    ("write_batch_size", "db_write_batch_size", "Write jobs committed per group-commit transaction.", ()),
+    ("write_batch_seconds", "db_write_batch_seconds", "Duration of group-commit transactions.", ()),
+)
+HISTOGRAM_BUCKETS = {
+    "latency": LATENCY_BUCKETS,
+    "db_statements": STATEMENT_BUCKETS,
+    "db_seconds": LATENCY_BUCKETS,
+    "password_hash": HASH_BUCKETS,
+    "write_batch_size": WRITE_BATCH_BUCKETS,
+    "write_batch_seconds": LATENCY_BUCKETS,
+}
+
+
+# Everything is updated in place from the event loop thread, so recording is a
+# couple of dict lookups and no locking. Labels are bounded by the route
+# templates, never by raw paths.
+#
+# Under serve.py every worker also writes a snapshot to a directory shared by
+# the supervisor, one file per pid, and /metrics refreshes its own file and sums
+# them all. Snapshots only move forward, so whichever worker serves the scrape,
+# totals never go backwards. Files of workers that have exited are kept for
+# the same reason; only their gauges are left out.
+class Metrics:
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.db_statements: Dict[Tuple[str, str], Histogram] = {}
+        self.db_seconds: Dict[Tuple[str, str], Histogram] = {}
+        self.password_hash: Dict[Tuple[str, str], Histogram] = {}
+        self.write_batch_size: Dict[Tuple[()], Histogram] = {}
+        self.write_batch_seconds: Dict[Tuple[()], Histogram] = {}
+        self.gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self.directory: Optional[str] = None
+
+    @staticmethod
+    def _histogram(store: dict, key: tuple, buckets: Tuple[float, ...]) -> Histogram:
+        histogram = store.get(key)
+        if histogram is None:
+            histogram = store[key] = Histogram(buckets)
+        return histogram
+
+    def observe_request(self, request: RequestMetrics, status_code: int, seconds: float):
+        key = (request.method, request.route)
+        self.requests[(*key, status_code)] = self.requests.get((*key, status_code), 0) + 1
+        self._histogram(self.latency, key, LATENCY_BUCKETS).observe(seconds)
+        self._histogram(self.db_statements, key, STATEMENT_BUCKETS).observe(request.statements)
+        self._histogram(self.db_seconds, key, LATENCY_BUCKETS).observe(request.db_seconds)
+
+    def observe_password_hash(self, operation: str, waited: float, ran: float):
+        self._histogram(self.password_hash, (operation, "wait"), HASH_BUCKETS).observe(waited)
+        self._histogram(self.password_hash, (operation, "run"), HASH_BUCKETS).observe(ran)
+
+    def observe_write_batch(self, size: int, seconds: float):
+        self._histogram(self.write_batch_size, (), WRITE_BATCH_BUCKETS).observe(size)
+        self._histogram(self.write_batch_seconds, (), LATENCY_BUCKETS).observe(seconds)
+
+    # Gauges are read when rendering, so the owner of the value does not have to
+    # push every change.
+    def register_gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        self.gauges[name] = (help_text, read)
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": [[*key, value] for key, value in self.requests.items()],
+            "histograms": {
+                attribute: [
+                    [list(key), histogram.counts, histogram.sum, histogram.count]
+                    for key, histogram in getattr(self, attribute).items()
+                ]
+                for attribute, *_ in HISTOGRAMS
+            },
+            "gauges": {name: [help_text, read()] for name, (help_text, read) in self.gauges.items()},
+        }
+
+    def merge(self, snapshot: dict, gauges: bool = True):
+        for *key, value in snapshot["requests"]:
+            key = tuple(key)
+            self.requests[key] = self.requests.get(key, 0) + value
+        for attribute, entries in snapshot["histograms"].items():
+            store = getattr(self, attribute)
+            for key, counts, total, count in entries:
+                histogram = self._histogram(store, tuple(key), HISTOGRAM_BUCKETS[attribute])
+                histogram.counts = [mine + theirs for mine, theirs in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+        if gauges:
+            for name, (help_text, value) in snapshot["gauges"].items():
+                current = self.gauges[name][1]() if name in self.gauges else 0
+                self.register_gauge(name, help_text, lambda value=current + value: value)
+
+    # Called by the supervisor before it forks.
+    def share(self, directory: str):
+        self.directory = directory
+
+    def write_snapshot(self):
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(f"{path}.tmp", path)
+
+    def collect(self) -> "Metrics":
+        if self.directory is None:
+            return self
+        self.write_snapshot()
+        combined = Metrics()
+        for name in os.listdir(self.directory):
+            pid, extension = os.path.splitext(name)
+            if extension != ".json":
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+            except (OSError, ValueError):
+                continue
+            combined.merge(snapshot, gauges=process_alive(int(pid)))
+        return combined
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_total Requests by method, route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), value in sorted(self.requests.items()):
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{escape(route)}",status="{status_code}"}} {value}'
+            )
+        for attribute, name, help_text, labels in HISTOGRAMS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in sorted(getattr(self, attribute).items()):
+                label = ",".join(f'{label}="{escape(str(value))}"' for label, value in zip(labels, key))
+                lines.extend(render_histogram(name, label, histogram))
+        for name, (help_text, read) in sorted(self.gauges.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_histogram(name: str, label: str, histogram: Histogram):
+    prefix = f"{label}," if label else ""
+    suffix = f"{{{label}}}" if label else ""
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        yield f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+    yield f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}'
+    yield f"{name}_sum{suffix} {histogram.sum}"
+    yield f"{name}_count{suffix} {histogram.count}"
+
+
+metrics = Metrics()
+
+
+async def run_metrics_snapshot_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        metrics.write_snapshot()
+
+
+# Pure ASGI rather than BaseHTTPMiddleware: no extra task or body buffering per
+# request.
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = RequestMetrics(scope)
+        token = current_request.set(request)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.observe_request(request, status_code, time.perf_counter() - start)
+            check_request_budget(request)
+            current_request.reset(token)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_start_time = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_start_time
+    request = current_request.get()
+    if request is not None:
+        request.statements += 1
+        request.db_seconds += elapsed
+    check_statement(request, statement, parameters, executemany, elapsed)
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from config.app_config import PASSWORD_HASH_POOL, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE
+from services.metrics_service import metrics
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# Workers report how long the job sat in the executor queue so the wait can be
+# told apart from the bcrypt work itself.
+def _hash(password: str, submitted: float) -> tuple[str, float]:
+    waited = time.monotonic() - submitted
+    return pwd_context.hash(password), waited
+
+
+def _hash_many(passwords: list[str], submitted: float) -> tuple[list[str], float]:
+    waited = time.monotonic() - submitted
+    return [pwd_context.hash(password) for password in passwords], waited
+
+
+def _verify(plain_password: str, hashed_password: str, submitted: float) -> tuple[bool, float]:
+    waited = time.monotonic() - submitted
+    return pwd_context.verify(plain_password, hashed_password), waited
+
+
+class PasswordHasher:
+    def __init__(self, pool: str = "thread", workers: int = 1, queue_size: int = 64):
+        self.pool = pool
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self._executor: Executor | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    # Process workers are spawned rather than forked: the parent already runs the
+    # event loop and aiosqlite driver threads, whose locks a fork would copy.
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.pool == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _submit(self, func, *args):
+        if self.queue_depth >= self.queue_size:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again later",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        submitted = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result, waited = await loop.run_in_executor(self._get_executor(), func, *args, submitted)
+        finally:
+            self.in_flight -= 1
+        ran = time.monotonic() - submitted - waited
+        self.completed += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.run_seconds_total += ran
+        metrics.observe_password_hash(func.__name__.lstrip("_"), waited, ran)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    # Large batches are split into one job per worker so they spread across every
+    # core without flooding the queue that interactive logins depend on.
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        chunk_size = -(-len(passwords) // self.workers) or 1
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        results = await asyncio.gather(*(self._submit(_hash_many, chunk) for chunk in chunks))
+        return [hashed for chunk in results for hashed in chunk]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(_verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "pool": self.pool,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+            "wait_seconds_avg": self.wait_seconds_total / self.completed if self.completed else 0.0,
+            "run_seconds_total": self.run_seconds_total,
+        }
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_POOL, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE)
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional
+
+from fastapi import HTTPException, status
+from PIL import Image, UnidentifiedImageError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from config.app_config import MEDIA_ROOT, PHOTO_MAX_BYTES, PHOTO_WIDTHS, PHOTO_WORKERS
+from schemas.blog_schema import PhotoRead, PhotoVariantRead
+
+MEDIA_URL = "/media/"
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+MEDIA_NAME = re.compile(r"^[0-9a-f]{64}(-\d+)?\.(jpg|png|gif|webp)$")
+
+
+def media_path(name: str) -> str:
+    return os.path.join(MEDIA_ROOT, name)
+
+
+def detect_format(head: bytes) -> Optional[str]:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+# Feeds the request body straight through the multipart parser: the "file" part is
+# hashed and written to a temporary file chunk by chunk, so the upload is never
+# held in memory or spooled by Starlette's form parser first.
+class PhotoUpload:
+    def __init__(self, boundary: bytes):
+        self.parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        })
+        self.temp_path = os.path.join(MEDIA_ROOT, f".upload-{uuid.uuid4().hex}")
+        self.hasher = hashlib.sha256()
+        self.head = b""
+        self.size = 0
+        self.found = False
+        self.file = None
+        self.headers = {}
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_part_begin(self):
+        self.headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field, self.header_value = b"", b""
+
+    def on_headers_finished(self):
+        _, params = parse_options_header(self.headers.get(b"content-disposition", b""))
+        if params.get(b"name") == b"file" and not self.found:
+            self.found = True
+            self.file = open(self.temp_path, "wb")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.file is None:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > PHOTO_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Photo is larger than {PHOTO_MAX_BYTES} bytes"
+            )
+        if len(self.head) < 16:
+            self.head += chunk[:16 - len(self.head)]
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+
+    def on_part_end(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    async def receive(self, chunks: AsyncIterator[bytes]):
+        async for chunk in chunks:
+            self.parser.write(chunk)
+        self.parser.finalize()
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+# Runs in a worker process. Variant names are derived from the original's digest,
+# so an image that was already processed is not resized again.
+def _make_variants(source: str, digest: str, widths: tuple, root: str) -> List[tuple[int, str]]:
+    variants = []
+    with Image.open(source) as image:
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        mode, extension, image_format = ("RGBA", "png", "PNG") if has_alpha else ("RGB", "jpg", "JPEG")
+        for width in sorted(widths):
+            if width >= image.width:
+                break
+            name = f"{digest}-{width}.{extension}"
+            path = os.path.join(root, name)
+            if not os.path.exists(path):
+                height = max(1, round(image.height * width / image.width))
+                variant = image.convert(mode).resize((width, height), Image.Resampling.LANCZOS)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                variant.save(temp_path, format=image_format, quality=82, optimize=True)
+                os.replace(temp_path, path)
+            variants.append((width, name))
+    return variants
+
+
+class PhotoProcessor:
+    def __init__(self, workers: int = 1):
+        self.workers = max(1, workers)
+        self._executor: ProcessPoolExecutor | None = None
+
+    # Spawned rather than forked: the parent runs the event loop alongside driver
+    # and hashing threads, which a forked child would inherit mid-flight.
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def make_variants(self, name: str, digest: str) -> List[tuple[int, str]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), _make_variants, media_path(name), digest, PHOTO_WIDTHS, MEDIA_ROOT
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+photo_processor = PhotoProcessor(PHOTO_WORKERS)
+
+
+async def save_photo(content_type: str, chunks: AsyncIterator[bytes]) -> PhotoRead:
+    mimetype, params = parse_options_header(content_type)
+    if mimetype != b"multipart/form-data" or not params.get(b"boundary"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Expected a multipart/form-data upload"
+        )
+    os.makedirs(MEDIA_ROOT, exist_ok=True)
+    upload = PhotoUpload(params[b"boundary"])
+    try:
+        await upload.receive(chunks)
+        if not upload.found:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing file field")
+        image_format = detect_format(upload.head)
+        if image_format is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Photo must be JPEG, PNG, GIF or WebP"
+            )
+        digest = upload.hasher.hexdigest()
+        name = f"{digest}.{image_format}"
+        # Originals are content-addressed: identical bytes already stored may
+        # belong to another blog, so they are kept as they are.
+        created = not os.path.exists(media_path(name))
+        if created:
+            os.replace(upload.temp_path, media_path(name))
+    finally:
+        upload.discard()
+    # Only Pillow's decoding errors mean a bad upload; anything else, such as a
+    # broken worker pool, propagates as a server error and keeps the original.
+    try:
+        variants = await photo_processor.make_variants(name, digest)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        if created:
+            os.remove(media_path(name))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Photo could not be decoded")
+    return PhotoRead(
+        url=MEDIA_URL + name,
+        size=upload.size,
+        variants=[PhotoVariantRead(width=width, url=MEDIA_URL + variant) for width, variant in variants],
+    )
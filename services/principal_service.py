@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from config.app_config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
+from services.cache_service import TTLCache
+from services.invalidation_service import invalidations
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: int
+    username: str
+    is_active: Optional[bool] = None
+    is_staff: Optional[bool] = None
+    is_superuser: Optional[bool] = None
+    is_owner: Optional[bool] = None
+
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+invalidations.register("principal", principal_cache.pop, principal_cache.clear)
+
+
+def invalidate_principal(username: str):
+    invalidations.publish("principal", username)
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, true
+
+from config.app_config import BLOG_PURGE_INTERVAL, BLOG_PURGE_RETENTION_DAYS, BLOG_PURGE_BATCH_SIZE
+from config.db_config import write_queue
+from models.blog_model import Blog
+
+logger = logging.getLogger(__name__)
+
+
+# Each batch is its own short write job and the loop yields between batches, so
+# a large backlog of tombstones never holds up the writer for long.
+async def purge_deleted_blogs(retention: timedelta, batch_size: int) -> int:
+    cutoff = datetime.utcnow() - retention
+    tombstones = (
+        select(Blog.id)
+        .where(Blog.is_delete == true(), Blog.modified < cutoff)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    purged = 0
+    while True:
+        result = await write_queue.submit(lambda sess: sess.execute(
+            delete(Blog).where(Blog.id.in_(tombstones)).execution_options(synchronize_session=False)
+        ))
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+        await asyncio.sleep(0.05)
+
+
+async def run_purge_loop():
+    retention = timedelta(days=BLOG_PURGE_RETENTION_DAYS)
+    while True:
+        try:
+            purged = await purge_deleted_blogs(retention, BLOG_PURGE_BATCH_SIZE)
+            if purged:
+                logger.info("Purged %d deleted blogs", purged)
+        except Exception:
+            logger.exception("Purging deleted blogs failed")
+        await asyncio.sleep(BLOG_PURGE_INTERVAL)
@@ -0,0 +1,59 @@
+import json
+import logging
+import re
+
+from config.app_config import SLOW_QUERY_MS, QUERY_BUDGET, QUERY_BUDGET_MODE
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+# Only the shape of the parameters is logged, never the values, which can hold
+# password hashes and personal data.
+def parameters_shape(parameters, executemany: bool) -> str:
+    if executemany:
+        rows = list(parameters) if parameters else []
+        return f"{len(rows)}x{parameters_shape(rows[0], False)}" if rows else "0x"
+    if isinstance(parameters, dict):
+        return "{" + ",".join(sorted(parameters)) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return f"({len(parameters)})"
+    return "()"
+
+
+def request_label(request) -> str:
+    return f"{request.method} {request.route}" if request is not None else "background"
+
+
+def log_slow_query(request, statement: str, parameters, executemany: bool, elapsed: float):
+    logger.warning(json.dumps({
+        "event": "slow_query",
+        "route": request_label(request),
+        "duration_ms": round(elapsed * 1000, 3),
+        "statement": WHITESPACE.sub(" ", statement).strip()[:1000],
+        "parameters": parameters_shape(parameters, executemany),
+    }))
+
+
+def check_statement(request, statement: str, parameters, executemany: bool, elapsed: float):
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        log_slow_query(request, statement, parameters, executemany, elapsed)
+    # In raise mode the offending statement fails, so a test or benchmark run sees
+    # an error on the exact request that went over budget.
+    if request is not None and QUERY_BUDGET_MODE == "raise" and 0 < QUERY_BUDGET < request.statements:
+        raise QueryBudgetExceeded(f"{request_label(request)} issued more than {QUERY_BUDGET} SQL statements")
+
+
+def check_request_budget(request):
+    if QUERY_BUDGET_MODE == "log" and 0 < QUERY_BUDGET < request.statements:
+        logger.warning(json.dumps({
+            "event": "query_budget_exceeded",
+            "route": request_label(request),
+            "statements": request.statements,
+            "budget": QUERY_BUDGET,
+        }))
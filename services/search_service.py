@@ -0,0 +1,34 @@
+import re
+from typing import Sequence
+
+from sqlalchemy import DateTime, Float, Row, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SEARCH_BLOGS = text("""
+    SELECT b.id, b.title, b.slug, b.blog_photo, b.short_description, b.save_type, b.author,
+           b.created, b.modified,
+           bm25("Blogs_fts", 10.0, 5.0, 1.0) AS rank,
+           snippet("Blogs_fts", -1, '<mark>', '</mark>', '…', 16) AS snippet
+    FROM "Blogs_fts"
+    JOIN "Blogs" AS b ON b.id = "Blogs_fts".rowid
+    WHERE "Blogs_fts" MATCH :query AND b.is_delete = 0
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""").columns(created=DateTime, modified=DateTime, rank=Float)
+
+
+# User input is reduced to quoted terms so FTS5 operators and syntax errors never
+# reach MATCH; the terms are ANDed and the last one also matches as a prefix.
+def build_match_query(q: str) -> str:
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return ""
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+async def search_blogs(sess: AsyncSession, q: str, limit: int, offset: int) -> Sequence[Row]:
+    query = build_match_query(q)
+    if not query:
+        return []
+    result = await sess.execute(SEARCH_BLOGS, {"query": query, "limit": limit, "offset": offset})
+    return result.all()
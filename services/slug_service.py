@@ -0,0 +1,54 @@
+from typing import Optional
+
+from sqlmodel import select
+
+from config.db_config import async_read_session
+from models.blog_model import Blog, LIVE_BLOG_FILTER
+from services.invalidation_service import invalidations
+
+
+class SlugMap:
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def warm(self):
+        async with async_read_session() as sess:
+            result = await sess.execute(select(Blog.slug, Blog.id).where(LIVE_BLOG_FILTER))
+            self._ids = dict(result.all())
+
+    async def resolve(self, slug: str) -> Optional[int]:
+        blog_id = self._ids.get(slug)
+        if blog_id is not None:
+            self.hits += 1
+            return blog_id
+        self.misses += 1
+        async with async_read_session() as sess:
+            result = await sess.execute(select(Blog.id).where(Blog.slug == slug, LIVE_BLOG_FILTER))
+            blog_id = result.scalar()
+        if blog_id is not None:
+            self._ids[slug] = blog_id
+        return blog_id
+
+    def set(self, slug: str, blog_id: int):
+        self._ids[slug] = blog_id
+
+    def discard(self, slug: str):
+        self._ids.pop(slug, None)
+
+    def clear(self):
+        self._ids.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._ids), "hits": self.hits, "misses": self.misses}
+
+
+slug_map = SlugMap()
+invalidations.register("slug", slug_map.discard, slug_map.clear)
+
+
+# New slugs need no event: other workers resolve a slug they do not know from
+# the database.
+def invalidate_slug(slug: str):
+    invalidations.publish("slug", slug)
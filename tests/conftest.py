@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# The app reads its settings at import time, so the temporary database is
+# configured before anything from the app is imported.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+TMP = tempfile.mkdtemp()
+os.environ["DB_FILE"] = os.path.join(TMP, "test.db")
+os.environ["MEDIA_ROOT"] = os.path.join(TMP, "media")
+os.environ.setdefault("BLOG_PURGE_INTERVAL", "0")
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlmodel import SQLModel
+
+from config.db_config import async_session, engine, init_engines
+from models.user_model import USER
+from services.password_service import pwd_context
+
+PASSWORD = "pw"
+
+
+# Every test runs in its own event loop, so pooled connections from the previous
+# one are dropped before the schema is rebuilt.
+async def reset_database():
+    await init_engines()
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+async def add_users(*usernames: str, owner: str = "owner") -> None:
+    hashed = pwd_context.hash(PASSWORD)
+    async with async_session() as sess:
+        for number, username in enumerate((owner, *usernames), start=1):
+            is_owner = username == owner
+            sess.add(USER(
+                username=username, password=hashed, gender="m", email=f"{username}@example.com",
+                phone_number=str(number), custom_user_id=username, date_joined=datetime.now(),
+                is_owner=is_owner, is_superuser=is_owner, is_staff=is_owner,
+            ))
+        await sess.commit()
+
+
+async def login(client, username: str) -> dict:
+    response = await client.post("/authenticate/gettoken/", json={"username": username, "password": PASSWORD})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
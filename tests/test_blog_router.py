@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+import pytest
+
+from config.db_config import async_session, write_queue
+from main import app
+from models.blog_model import Blog
+from services.counter_service import rebuild_counters
+from support import add_users, login, reset_database
+
+
+@pytest.mark.parametrize("params", [
+    {"q": "a", "limit": -1},
+    {"q": "a", "limit": 0},
+    {"q": "a", "offset": -1},
+])
+def test_search_rejects_out_of_range_paging(params):
+    async def search():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/blogs/search", params=params)
+
+    assert asyncio.run(search()).status_code == 422
+
+
+# Both updates are held back until they are queued, so the writer commits them
+# in one batch: the second one failing must not disturb the first.
+def test_concurrent_updates_to_one_blog_in_a_batch_stay_isolated():
+    async def scenario():
+        await reset_database()
+        await add_users()
+        async with async_session() as sess:
+            sess.add(Blog(title="a", slug="a", text="text", author=1))
+            sess.add(Blog(title="taken", slug="taken", text="text", author=1))
+            await sess.commit()
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                headers = await login(client, "owner")
+                assert (await client.get("/blogs/1")).json()["title"] == "a"
+
+                holding, release = asyncio.Event(), asyncio.Event()
+
+                async def hold(sess):
+                    holding.set()
+                    await release.wait()
+
+                held = asyncio.create_task(write_queue.submit(hold))
+                await holding.wait()
+                first = asyncio.create_task(client.put("/blogs/1", json={"title": "new"}, headers=headers))
+                await wait_for_depth(1)
+                second = asyncio.create_task(client.put("/blogs/1", json={"slug": "taken"}, headers=headers))
+                await wait_for_depth(2)
+                release.set()
+                await held
+
+                first, second = await first, await second
+                assert first.status_code == 200
+                assert (first.json()["title"], first.json()["slug"]) == ("new", "a")
+                assert second.status_code == 400
+                assert (await client.get("/blogs/1")).json()["title"] == "new"
+
+    asyncio.run(scenario())
+
+
+async def wait_for_depth(depth: int):
+    while write_queue.depth != depth:
+        await asyncio.sleep(0.01)
+
+
+def test_listings_put_the_total_in_the_body_only_when_asked():
+    async def scenario():
+        await reset_database()
+        await add_users("reader")
+        async with async_session() as sess:
+            for slug in ["a", "b", "c"]:
+                sess.add(Blog(title=slug, slug=slug, text="text", author=1))
+            await sess.commit()
+            await rebuild_counters(sess)
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                plain = await client.get("/blogs/", params={"limit": 2})
+                counted = await client.get("/blogs/", params={"limit": 2, "with_count": True})
+                assert plain.headers["X-Total-Count"] == counted.headers["X-Total-Count"] == "3"
+                assert counted.json() == {"count": 3, "items": plain.json()}
+                assert counted.headers["ETag"] != plain.headers["ETag"]
+
+                headers = await login(client, "owner")
+                users = await client.get("/superusers/", params={"with_count": True}, headers=headers)
+                assert users.json()["count"] == 2
+                assert [user["username"] for user in users.json()["items"]] == ["owner", "reader"]
+
+    asyncio.run(scenario())
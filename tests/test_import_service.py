@@ -0,0 +1,89 @@
+import asyncio
+import json
+import sqlite3
+
+import httpx
+from sqlalchemy import func
+from sqlmodel import select
+
+from config.db_config import async_session, sqlite_file_name, write_queue
+from models.blog_model import Blog
+from main import app
+from services.password_service import password_hasher
+from support import add_users, login, reset_database
+
+
+# The write lock must be free while passwords are hashed: an outside writer
+# that refuses to wait still gets in.
+def test_bulk_user_import_holds_no_write_lock_while_hashing(monkeypatch):
+    hash_many = password_hasher.hash_many
+    lock_free = []
+
+    async def hash_and_probe(passwords):
+        connection = sqlite3.connect(sqlite_file_name, timeout=0, isolation_level=None)
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("ROLLBACK")
+            lock_free.append(True)
+        except sqlite3.OperationalError:
+            lock_free.append(False)
+        finally:
+            connection.close()
+        return await hash_many(passwords)
+
+    monkeypatch.setattr(password_hasher, "hash_many", hash_and_probe)
+
+    async def scenario():
+        await reset_database()
+        await add_users("taken")
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                headers = await login(client, "owner")
+                users = [
+                    {"username": name, "password": "secret", "email": f"{name}@example.com",
+                     "phone_number": f"09{number:05d}", "gender": "m"}
+                    for number, name in enumerate(["new1", "new2", "taken", "new3"])
+                ]
+                response = await client.post("/users/bulk", params={"batch_size": 2}, json=users, headers=headers)
+                assert response.status_code == 200
+                body = response.json()
+                assert [user["username"] for user in body["created"]] == ["new1", "new2", "new3"]
+                assert [(error["index"], error["detail"]) for error in body["errors"]] == [
+                    (2, "Username already taken")
+                ]
+
+    asyncio.run(scenario())
+    assert lock_free == [True]
+
+
+# Each batch is a write job, and a slug already taken only rejects its own line.
+def test_bulk_blog_import_writes_each_batch_through_the_write_queue():
+    async def scenario():
+        await reset_database()
+        await add_users()
+        async with async_session() as sess:
+            sess.add(Blog(title="taken", slug="taken", text="text", author=1))
+            await sess.commit()
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                headers = await login(client, "owner")
+                body = "\n".join(
+                    json.dumps({"title": slug, "slug": slug, "text": "text", "save_type": "N", "author": 1})
+                    for slug in ["one", "taken", "two", "three"]
+                )
+                jobs = write_queue.jobs
+                response = await client.post(
+                    "/blogs/bulk", params={"batch_size": 2}, content=body, headers=headers
+                )
+                assert response.status_code == 200
+                assert response.json() == {"inserted": 3, "errors": [{"line": 2, "detail": "Slug already taken"}]}
+                assert write_queue.jobs - jobs == 2
+
+        async with async_session() as sess:
+            return (await sess.execute(select(func.count()).select_from(Blog))).scalar()
+
+    assert asyncio.run(scenario()) == 4
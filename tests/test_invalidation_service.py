@@ -0,0 +1,50 @@
+import multiprocessing
+
+from services.invalidation_service import InvalidationChannel
+
+fork = multiprocessing.get_context("fork")
+
+
+def publish_in_child(channel, *events):
+    def publish():
+        for kind, key in events:
+            channel.publish(kind, key)
+
+    process = fork.Process(target=publish)
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+
+def shared_channel(slots):
+    seen = []
+    channel = InvalidationChannel()
+    channel.register("blog", seen.append, lambda: seen.append("*"))
+    channel.share(slots)
+    return channel, seen
+
+
+def test_events_published_by_another_worker_are_replayed():
+    channel, seen = shared_channel(8)
+    publish_in_child(channel, ("blog", "7"), ("principal", "nobody"), ("blog", "9"))
+    channel.poll()
+    assert seen == ["7", "9"]
+    channel.poll()
+    assert seen == ["7", "9"]
+
+
+def test_falling_a_whole_ring_behind_clears_every_cache():
+    channel, seen = shared_channel(4)
+    publish_in_child(channel, *(("blog", str(number)) for number in range(5)))
+    channel.poll()
+    assert seen == ["*"]
+    assert channel.stats()["overflows"] == 1
+    assert channel.stats()["lag"] == 0
+
+
+def test_a_new_worker_does_not_replay_history():
+    channel, seen = shared_channel(8)
+    publish_in_child(channel, ("blog", "1"))
+    channel.seek_head()
+    channel.poll()
+    assert seen == []
@@ -0,0 +1,34 @@
+import asyncio
+
+import httpx
+
+from config.db_config import async_session
+from main import app
+from models.user_model import USER
+from services.last_login_service import last_login_buffer
+from support import add_users, login, reset_database
+
+
+def test_flush_skips_user_deleted_after_login():
+    async def scenario():
+        await reset_database()
+        await add_users("gone")
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                headers = await login(client, "owner")
+                await login(client, "gone")
+                response = await client.delete("/users/2", headers=headers)
+                assert response.status_code == 200
+
+                assert await last_login_buffer.flush() == 2
+                assert last_login_buffer.stats()["pending"] == 0
+                assert last_login_buffer.stats()["failures"] == 0
+
+        async with async_session() as sess:
+            owner = await sess.get(USER, 1)
+            assert owner.last_login is not None
+            assert await sess.get(USER, 2) is None
+
+    asyncio.run(scenario())
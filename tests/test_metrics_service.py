@@ -0,0 +1,23 @@
+import json
+
+from services.metrics_service import Metrics
+
+EXITED_PID = 2 ** 22 + 1
+
+
+def test_collect_sums_every_worker_and_drops_gauges_of_exited_ones(tmp_path):
+    exited = Metrics()
+    exited.observe_write_batch(3, 0.01)
+    exited.register_gauge("db_write_queue_depth", "Depth.", lambda: 5)
+    (tmp_path / f"{EXITED_PID}.json").write_text(json.dumps(exited.snapshot()))
+
+    live = Metrics()
+    live.share(str(tmp_path))
+    live.observe_write_batch(1, 0.02)
+    live.register_gauge("db_write_queue_depth", "Depth.", lambda: 2)
+
+    combined = live.collect()
+    assert combined.write_batch_size[()].count == 2
+    assert combined.write_batch_size[()].sum == 4
+    assert combined.gauges["db_write_queue_depth"][1]() == 2
+    assert "db_write_queue_depth 2" in combined.render()
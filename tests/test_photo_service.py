@@ -0,0 +1,59 @@
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from services import photo_service
+from services.photo_service import media_path, save_photo
+
+BOUNDARY = "photo-boundary"
+
+
+def multipart(data: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="photo.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def upload(data: bytes):
+    async def chunks():
+        yield multipart(data)
+
+    return await save_photo(f"multipart/form-data; boundary={BOUNDARY}", chunks())
+
+
+def jpeg(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (10, 120, 200)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_undecodable_upload_is_rejected_and_removed():
+    data = b"\xff\xd8\xff" + b"not really a jpeg" * 8
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(upload(data))
+    assert error.value.status_code == 400
+    assert not os.path.exists(media_path(f"{hashlib.sha256(data).hexdigest()}.jpg"))
+
+
+def test_processing_failure_keeps_an_original_uploaded_before(monkeypatch):
+    data = jpeg(400, 300)
+    photo = asyncio.run(upload(data))
+    original = media_path(photo.url.rsplit("/", 1)[1])
+    assert [variant.width for variant in photo.variants] == [320]
+
+    async def broken(name, digest):
+        raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(photo_service.photo_processor, "make_variants", broken)
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(upload(data))
+    assert os.path.exists(original)
+    photo_service.photo_processor.shutdown()
@@ -0,0 +1,41 @@
+import asyncio
+
+from sqlalchemy import text
+
+from config.db_config import WriteQueue, init_engines
+from services.metrics_service import RequestMetrics, current_request
+
+
+async def select_one(sess):
+    return (await sess.execute(text("SELECT 1"))).scalar()
+
+
+def test_submit_restarts_a_writer_that_died():
+    async def scenario():
+        await init_engines()
+        queue = WriteQueue()
+        queue.start()
+        queue._task.cancel()
+        await asyncio.gather(queue._task, return_exceptions=True)
+        assert await asyncio.wait_for(queue.submit(select_one), 5) == 1
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+# Only the job's own statement is charged to the request that happened to start
+# the writer; the transaction and SAVEPOINT statements around it are not.
+def test_writer_started_by_a_request_does_not_charge_it_for_the_batch():
+    async def scenario():
+        await init_engines()
+        queue = WriteQueue()
+        request = RequestMetrics({"method": "POST"})
+        token = current_request.set(request)
+        try:
+            await queue.submit(select_one)
+        finally:
+            current_request.reset(token)
+        await queue.stop()
+        return request.statements
+
+    assert asyncio.run(scenario()) == 1